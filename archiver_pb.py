@@ -0,0 +1,200 @@
+import struct
+from datetime import datetime, timezone
+import numpy as np
+from lazy_import import lazy_import
+
+requests = lazy_import("requests")
+
+# --- Archiver Appliance PB/HTTP (getData.raw) ---
+# https://epicsarchiver.readthedocs.io/en/latest/developer/pb_pbraw.html
+# 응답은 chunk 의 연속: PayloadInfo 한 줄 + 샘플 한 줄씩, chunk 사이는 빈 줄.
+# 각 줄은 protobuf 메시지를 escape 한 것 (0x1B 0x01 -> 0x1B, 0x1B 0x02 -> \n, 0x1B 0x03 -> \r)
+archiver_pb_url = "https://pswww.slac.stanford.edu/archiveviewer/retrieval/data/getData.raw"
+# 응답을 이 크기씩 읽음 (stream 으로 받아야 GUI 의 Cancel 이 받는 도중에 끊을 수 있음)
+fetch_block = 1 << 20
+
+# EPICSEvent.proto PayloadType -> field 3 (val) 의 해석
+SCALAR_STRING, SCALAR_SHORT, SCALAR_FLOAT, SCALAR_ENUM, SCALAR_BYTE, SCALAR_INT, SCALAR_DOUBLE = range(7)
+
+_unpack_double = struct.Struct("<d").unpack_from
+_unpack_float = struct.Struct("<f").unpack_from
+_unpack_int = struct.Struct("<i").unpack_from
+
+
+def _unescape(line: bytes) -> bytes:
+    if b"\x1b" not in line:
+        return line
+    return line.replace(b"\x1b\x03", b"\r").replace(b"\x1b\x02", b"\n").replace(b"\x1b\x01", b"\x1b")
+
+
+def _varint(buf, i):
+    result = shift = 0
+    while True:
+        b = buf[i]
+        i += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, i
+        shift += 7
+
+
+def _skip(buf, i, wire):
+    if wire == 0:
+        return _varint(buf, i)[1]
+    if wire == 1:
+        return i + 8
+    if wire == 2:
+        n, i = _varint(buf, i)
+        return i + n
+    if wire == 5:
+        return i + 4
+    raise ValueError(f"unsupported protobuf wire type {wire}")
+
+
+def _parse_payload_info(buf):
+    # PayloadInfo: 1 type, 2 pvname, 3 year
+    ptype, year, i = None, None, 0
+    while i < len(buf):
+        key, i = _varint(buf, i)
+        field, wire = key >> 3, key & 7
+        if field == 1 and wire == 0:
+            ptype, i = _varint(buf, i)
+        elif field == 3 and wire == 0:
+            year, i = _varint(buf, i)
+        else:
+            i = _skip(buf, i, wire)
+    return ptype, year
+
+
+def _parse_sample(buf, ptype):
+    # Scalar*: 1 secondsintoyear, 2 nano, 3 val
+    secs = nano = 0
+    val = np.nan
+    i = 0
+    while i < len(buf):
+        key, i = _varint(buf, i)
+        field, wire = key >> 3, key & 7
+        if field == 1 and wire == 0:
+            secs, i = _varint(buf, i)
+        elif field == 2 and wire == 0:
+            nano, i = _varint(buf, i)
+        elif field == 3:
+            if wire == 1:
+                val = _unpack_double(buf, i)[0]
+                i += 8
+            elif wire == 5:
+                val = (_unpack_float if ptype == SCALAR_FLOAT else _unpack_int)(buf, i)[0]
+                i += 4
+            elif wire == 0:
+                v, i = _varint(buf, i)
+                val = (v >> 1) ^ -(v & 1)  # sint32 zigzag
+            else:
+                i = _skip(buf, i, wire)
+        else:
+            i = _skip(buf, i, wire)
+    return secs, nano, val
+
+
+def _read_varint(data, pos, ends, ok):
+    # 줄마다 varint 하나씩 (최대 10 byte) 를 벡터로 읽음
+    val = np.zeros(len(pos), dtype=np.int64)
+    done = np.zeros(len(pos), dtype=bool)
+    for k in range(10):
+        b = data[np.minimum(pos, len(data) - 1)].astype(np.int64)
+        active = ~done & (pos < ends)
+        val |= np.where(active, (b & 0x7F) << (7 * k), 0)
+        pos = np.where(active, pos + 1, pos)
+        done |= active & (b < 0x80)
+        if done.all():
+            break
+    return val, pos, ok & done
+
+
+def _read_tag(data, pos, ends, ok, tag):
+    ok = ok & (pos < ends) & (data[np.minimum(pos, len(data) - 1)] == tag)
+    return pos + 1, ok
+
+
+def _read_fixed(data, pos, ends, ok, dtype):
+    size = np.dtype(dtype).itemsize
+    ok = ok & (pos + size <= ends)
+    idx = np.minimum(pos[:, None] + np.arange(size), len(data) - 1)
+    return np.ascontiguousarray(data[idx]).view(dtype)[:, 0].astype(np.float64), ok
+
+
+def _decode_samples_fast(data, starts, ends, ptype):
+    # 흔한 레이아웃 (1 secondsintoyear, 2 nano, 3 val 순서, escape 없음) 은 numpy 로 한 번에 디코딩.
+    # 나머지 줄은 ok=False 로 돌려서 _parse_sample 로 처리
+    ok = np.ones(len(starts), dtype=bool)
+    pos, ok = _read_tag(data, starts, ends, ok, 0x08)
+    secs, pos, ok = _read_varint(data, pos, ends, ok)
+    pos, ok = _read_tag(data, pos, ends, ok, 0x10)
+    nano, pos, ok = _read_varint(data, pos, ends, ok)
+    if ptype == SCALAR_DOUBLE:
+        pos, ok = _read_tag(data, pos, ends, ok, 0x19)
+        val, ok = _read_fixed(data, pos, ends, ok, "<f8")
+    elif ptype in (SCALAR_FLOAT, SCALAR_INT):
+        pos, ok = _read_tag(data, pos, ends, ok, 0x1D)
+        val, ok = _read_fixed(data, pos, ends, ok, "<f4" if ptype == SCALAR_FLOAT else "<i4")
+    elif ptype in (SCALAR_SHORT, SCALAR_ENUM):
+        pos, ok = _read_tag(data, pos, ends, ok, 0x18)
+        v, pos, ok = _read_varint(data, pos, ends, ok)
+        val = ((v >> 1) ^ -(v & 1)).astype(np.float64)
+    else:
+        val = np.full(len(starts), np.nan)
+        ok[:] = False
+    return secs, nano, val, ok
+
+
+def decode_pb(raw: bytes):
+    # returns (epoch seconds float64, value float64) arrays
+    data = np.frombuffer(raw, dtype=np.uint8)
+    newlines = np.flatnonzero(data == 0x0A)
+    if len(data) and data[-1] != 0x0A:
+        newlines = np.append(newlines, len(data))
+    starts = np.concatenate(([0], newlines[:-1] + 1)).astype(np.int64)
+    ends = newlines.astype(np.int64)
+    if len(ends) == 0:
+        return np.empty(0), np.empty(0)
+
+    # escape 가 들어간 줄은 byte offset 이 달라지므로 fast path 에서 제외
+    esc = np.concatenate(([0], np.cumsum(data == 0x1B)))
+    has_esc = esc[ends] - esc[starts] > 0
+
+    # 빈 줄 다음 줄이 새 chunk 의 PayloadInfo
+    empty = starts == ends
+    header = np.zeros(len(starts), dtype=bool)
+    header[0] = True
+    header[1:] |= empty[:-1]
+    header &= ~empty
+    header_idx = np.flatnonzero(header)
+
+    ts_parts, val_parts = [], []
+    for k, h in enumerate(header_idx):
+        stop = header_idx[k + 1] if k + 1 < len(header_idx) else len(starts)
+        ptype, year = _parse_payload_info(_unescape(raw[starts[h]:ends[h]]))
+        year_start = datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()
+
+        rows = np.arange(h + 1, stop)
+        rows = rows[~empty[rows]]
+        secs, nano, val, ok = _decode_samples_fast(data, starts[rows], ends[rows], ptype)
+        ok &= ~has_esc[rows]
+        secs, nano = secs.astype(np.float64), nano.astype(np.float64)
+        for j in np.flatnonzero(~ok):
+            r = rows[j]
+            secs[j], nano[j], val[j] = _parse_sample(_unescape(raw[starts[r]:ends[r]]), ptype)
+        ts_parts.append(year_start + secs + nano * 1e-9)
+        val_parts.append(val)
+
+    if not ts_parts:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(ts_parts), np.concatenate(val_parts)
+
+
+def fetch_pv_arrays(pv: str, start: str, end: str, session=None):
+    # returns (timestamps, values, bytes transferred)
+    with (session or requests).get(archiver_pb_url, params={"pv": pv, "from": start, "to": end}, stream=True) as r:
+        r.raise_for_status()
+        body = b"".join(r.iter_content(chunk_size=fetch_block))
+    ts, values = decode_pb(body)
+    return ts, values, len(body)
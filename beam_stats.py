@@ -0,0 +1,153 @@
+import numpy as np
+from lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+# --- beam availability: threshold 이상인 시간 (샘플 시간 간격으로 적분) ---
+# 샘플 i 의 값은 다음 샘플까지 유지된다고 봄. 간격이 max_gap 보다 길면 그 구간은 "데이터 없음"
+# 시간은 모두 epoch seconds (float)
+
+# PV 이름 (epics_pvs 의 key) -> mJ
+availability_thresholds = {"GMD": 0.1, "XGMD": 0.1}
+# 이보다 긴 샘플 간격은 beam 상태를 모르는 구간 (archiver 가 못 받았거나 IOC 가 멈춤)
+availability_max_gap = 60.0
+
+
+def epoch_seconds(timestamps):
+    # tz-aware Timestamp Series -> float64 epoch seconds
+    if len(timestamps) == 0:
+        return np.empty(0)
+    return (timestamps - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+
+
+def sample_segments(t, v, threshold, max_gap=None):
+    # 샘플마다 (유효 시간, threshold 이상 여부). 마지막 샘플과 max_gap 을 넘는 간격은 유효 시간 0
+    max_gap = availability_max_gap if max_gap is None else max_gap
+    dt = np.diff(t, append=t[-1] if len(t) else 0.0)
+    dt = np.where(dt <= max_gap, dt, 0.0)
+    above = v >= threshold  # NaN 은 below
+    return dt, above
+
+
+class Integral:
+    # 시간 t 까지의 누적 (데이터 있는 시간, threshold 이상 시간). 임의의 구간 [a, b] 를 O(log n) 으로 계산
+    def __init__(self, t, v, threshold, max_gap=None):
+        self.t = np.asarray(t, dtype=np.float64)
+        self.dt, above = sample_segments(self.t, np.asarray(v, dtype=np.float64), threshold, max_gap)
+        self.above = above.astype(np.float64)
+        self.covered_cum = np.concatenate(([0.0], np.cumsum(self.dt)))
+        self.above_cum = np.concatenate(([0.0], np.cumsum(self.dt * self.above)))
+
+    def at(self, x):
+        # returns (covered, above) seconds in (-inf, x]
+        x = np.asarray(x, dtype=np.float64)
+        if len(self.t) == 0:
+            return np.zeros(x.shape), np.zeros(x.shape)
+        i = np.searchsorted(self.t, x, side="right") - 1
+        inside = i >= 0
+        j = np.clip(i, 0, len(self.t) - 1)
+        partial = np.where(inside, np.clip(x - self.t[j], 0.0, self.dt[j]), 0.0)
+        covered = np.where(inside, self.covered_cum[j] + partial, 0.0)
+        above = np.where(inside, self.above_cum[j] + partial * self.above[j], 0.0)
+        return covered, above
+
+    def between(self, starts, ends):
+        # 구간들 [starts, ends] 의 (데이터 있는 시간, threshold 이상 시간) 배열
+        c0, a0 = self.at(starts)
+        c1, a1 = self.at(ends)
+        return c1 - c0, a1 - a0
+
+
+def merge_intervals(starts, ends):
+    # 겹치는 구간을 합침 (같은 hutch 의 program 이 겹쳐도 두 번 세지 않게). returns (starts, ends), start 순
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    s, e = starts[order], ends[order]
+    prev_end = np.r_[-np.inf, np.maximum.accumulate(e)[:-1]]
+    idx = np.flatnonzero(s > prev_end)
+    return s[idx], np.maximum.reduceat(e, idx)
+
+
+def hutch_availability(programs, series, hutch_pv, t0, t1, thresholds=None, max_gap=None):
+    # programs: schedule.Schedule, series: {pv name: (t, v)}, hutch_pv(hutch) -> pv name
+    # returns DataFrame (hutch 별): pv, scheduled_h, covered_h, delivered_h, no_data_h, availability_pct
+    thresholds = {**availability_thresholds, **(thresholds or {})}
+    # 창과 겹치는 program 만 (interval index)
+    idx = programs.query(t0, t1)
+    starts = np.clip(programs.start[idx], t0, t1)
+    ends = np.clip(programs.end[idx], t0, t1)
+    codes = programs.code[idx]
+    keep = ends > starts
+
+    rows = []
+    integrals = {}
+    for code in np.unique(codes[keep]):
+        hutch = programs.labels[code]
+        pv = hutch_pv(hutch)
+        if pv not in series:
+            continue
+        if pv not in integrals:
+            integrals[pv] = Integral(*series[pv], thresholds[pv], max_gap)
+        mask = keep & (codes == code)
+        hutch_starts, hutch_ends = merge_intervals(starts[mask], ends[mask])
+        covered, above = integrals[pv].between(hutch_starts, hutch_ends)
+        scheduled = float(np.sum(hutch_ends - hutch_starts))
+        rows.append({"hutch": hutch, "pv": pv,
+                     "scheduled_h": scheduled / 3600,
+                     "covered_h": float(covered.sum()) / 3600,
+                     "delivered_h": float(above.sum()) / 3600,
+                     "no_data_h": (scheduled - float(covered.sum())) / 3600,
+                     "availability_pct": 100 * float(above.sum()) / scheduled if scheduled else np.nan})
+    columns = ["pv", "scheduled_h", "covered_h", "delivered_h", "no_data_h", "availability_pct"]
+    if not rows:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="hutch"))
+    return pd.DataFrame(rows).set_index("hutch")[columns]
+
+
+def window_totals(series, t0, t1, thresholds=None, max_gap=None):
+    # PV 별 창 전체의 above / below / 데이터 없음 시간 (hours)
+    thresholds = {**availability_thresholds, **(thresholds or {})}
+    rows = {}
+    for pv, (t, v) in series.items():
+        covered, above = Integral(t, v, thresholds[pv], max_gap).between(np.array([t0]), np.array([t1]))
+        rows[pv] = {"threshold": thresholds[pv],
+                    "above_h": above[0] / 3600,
+                    "below_h": (covered[0] - above[0]) / 3600,
+                    "no_data_h": (t1 - t0 - covered[0]) / 3600}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+# --- downtime 자동 검출 ---
+# PV 이름 -> (down 으로 보는 값, 다시 up 으로 보는 값) mJ. 사이 값은 직전 상태 유지 (hysteresis)
+downtime_thresholds = {"GMD": (0.05, 0.1), "XGMD": (0.05, 0.1)}
+# 이보다 짧은 down 은 무시
+downtime_min_minutes = 5
+
+
+def hysteresis_down(v, low, high):
+    # 샘플마다 down 여부: low 미만이면 down, high 이상이면 up, 그 사이 (와 NaN) 는 직전 상태. 처음은 up
+    state = np.full(len(v), -1, dtype=np.int8)
+    state[v < low] = 1
+    state[v >= high] = 0
+    idx = np.where(state >= 0, np.arange(len(v)), -1)
+    last = np.maximum.accumulate(idx) if len(v) else idx
+    return np.where(last >= 0, state[np.maximum(last, 0)], 0).astype(bool)
+
+
+def downtime_runs(t, v, low, high, min_duration=None, max_gap=None):
+    # down 구간 (starts, ends) epoch 배열. max_gap 을 넘는 데이터 공백에서는 구간을 끊음 (archiver 공백은 downtime 아님)
+    min_duration = downtime_min_minutes * 60 if min_duration is None else min_duration
+    max_gap = availability_max_gap if max_gap is None else max_gap
+    t = np.asarray(t, dtype=np.float64)
+    if len(t) == 0:
+        return np.empty(0), np.empty(0)
+    down = hysteresis_down(np.asarray(v, dtype=np.float64), low, high)
+    dt, _ = sample_segments(t, v, high, max_gap)
+    # 샘플 i 와 i+1 이 공백 없이 이어짐 (같은 timestamp 가 반복돼도 이어진 것으로)
+    linked = np.diff(t) <= max_gap
+    begin = down & ~np.r_[False, down[:-1] & linked]
+    finish = down & ~np.r_[down[1:] & linked, False]
+    starts, ends = t[begin], t[finish] + dt[finish]
+    keep = ends - starts >= min_duration
+    return starts[keep], ends[keep]
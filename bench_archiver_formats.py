@@ -0,0 +1,93 @@
+import argparse, io, struct, time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import requests
+
+import archiver_pb
+from report_gui import epics_pvs, archiver_time_fmt
+
+# getData.csv vs getData.raw (PB/HTTP): 전송량과 파싱 시간 비교
+# python bench_archiver_formats.py --hours 24            (archiver 에서 직접)
+# python bench_archiver_formats.py --synthetic 1000000   (오프라인, 가짜 샘플)
+
+csv_url = "https://pswww.slac.stanford.edu/archiveviewer/retrieval/data/getData.csv"
+
+
+def parse_csv(text):
+    df = pd.read_csv(io.StringIO(text), header=None,
+                     names=["Timestamp", "Value1", "Value2", "Value3", "Value4"])
+    df = df[pd.to_numeric(df["Timestamp"], errors='coerce').notnull()]
+    return df["Timestamp"].astype(float).to_numpy(), pd.to_numeric(df["Value1"], errors='coerce').to_numpy()
+
+
+def _varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _escape(msg):
+    return msg.replace(b"\x1b", b"\x1b\x01").replace(b"\n", b"\x1b\x02").replace(b"\r", b"\x1b\x03")
+
+
+def synthetic_payloads(n, year=2025):
+    # ScalarDouble 샘플 n 개를 CSV 와 PB 두 형식으로 만듦
+    year_start = datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()
+    secs = np.arange(n, dtype=np.int64) // 120 + 86400
+    nano = (np.arange(n, dtype=np.int64) % 120) * 8_333_333
+    values = np.random.default_rng(0).normal(1.5, 0.3, n)
+
+    header = b"\x08\x06" + b"\x12\x04TEST" + b"\x18" + _varint(year)
+    lines = [_escape(header)]
+    for s, ns, v in zip(secs.tolist(), nano.tolist(), values.tolist()):
+        lines.append(_escape(b"\x08" + _varint(s) + b"\x10" + _varint(ns) + b"\x19" + struct.pack("<d", v)))
+    raw = b"\n".join(lines) + b"\n"
+
+    ts = year_start + secs + nano * 1e-9
+    text = "".join(f"{t:.9f},{v},0,0,\n" for t, v in zip(ts.tolist(), values.tolist()))
+    return text.encode(), raw
+
+
+def bench(label, csv_bytes, raw_bytes):
+    t0 = time.perf_counter()
+    ts_csv, val_csv = parse_csv(csv_bytes.decode())
+    t_csv = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ts_pb, val_pb = archiver_pb.decode_pb(raw_bytes)
+    t_pb = time.perf_counter() - t0
+
+    print(f"{label}: {len(ts_csv)} csv samples, {len(ts_pb)} pb samples")
+    print(f"  csv : {len(csv_bytes)/1e6:8.2f} MB  parse {t_csv:7.3f} s")
+    print(f"  pb  : {len(raw_bytes)/1e6:8.2f} MB  parse {t_pb:7.3f} s")
+    print(f"  size ratio pb/csv = {len(raw_bytes)/max(len(csv_bytes), 1):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="getData.csv vs getData.raw benchmark")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--end", default=None, help="UTC end, e.g. 2025-09-09T00:00:00")
+    parser.add_argument("--synthetic", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        csv_bytes, raw_bytes = synthetic_payloads(args.synthetic)
+        bench("synthetic", csv_bytes, raw_bytes)
+        return
+
+    end = datetime.strptime(args.end, "%Y-%m-%dT%H:%M:%S") if args.end else datetime.now(timezone.utc).replace(tzinfo=None)
+    start = end - timedelta(hours=args.hours)
+    params = {"from": start.strftime(archiver_time_fmt), "to": end.strftime(archiver_time_fmt)}
+    for name, (pv, _) in epics_pvs.items():
+        csv_r = requests.get(csv_url, params={"pv": pv, **params})
+        csv_r.raise_for_status()
+        raw_r = requests.get(archiver_pb.archiver_pb_url, params={"pv": pv, **params})
+        raw_r.raise_for_status()
+        bench(f"{name} ({pv}, {args.hours:g} h)", csv_r.content, raw_r.content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse, re, time
+from datetime import datetime, timezone
+
+import ics_calendar
+
+# 예전 regex 방식 (sync_hutch_from_calendar_noics) vs ics_calendar.iter_ics_events
+# python bench_ics_parser.py --events 20000
+
+
+def parse_regex(text):
+    events = []
+    for ev in re.findall(r"BEGIN:VEVENT(.*?)END:VEVENT", text, flags=re.DOTALL):
+        dtstart_match = re.search(r"DTSTART(?:;[^:]*)?:(\d{8}T\d{6}Z)", ev)
+        dtend_match = re.search(r"DTEND(?:;[^:]*)?:(\d{8}T\d{6}Z)", ev)
+        if not dtstart_match or not dtend_match:
+            continue
+        start = datetime.strptime(dtstart_match.group(1), "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        end = datetime.strptime(dtend_match.group(1), "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        events.append((start.timestamp(), end.timestamp()))
+    return events
+
+
+def synthetic_feed(n):
+    # Google Calendar basic.ics 와 비슷하게: UTC / TZID / 종일 event 를 섞고, 긴 DESCRIPTION 은 75자로 접음
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "X-WR-TIMEZONE:America/Los_Angeles"]
+    description = "DESCRIPTION:" + "beamtime proposal details, contact list and notes. " * 8
+    for i in range(n):
+        day = datetime(2015, 1, 1).toordinal() + i // 3
+        d = datetime.fromordinal(day)
+        lines += ["BEGIN:VEVENT", f"UID:{i:08d}@google.com", f"SEQUENCE:{i % 3}"]
+        if i % 3 == 0:
+            lines += [f"DTSTART:{d:%Y%m%d}T140000Z", f"DTEND:{d:%Y%m%d}T230000Z"]
+        elif i % 3 == 1:
+            lines += [f"DTSTART;TZID=America/Los_Angeles:{d:%Y%m%d}T180000",
+                      f"DTEND;TZID=America/Los_Angeles:{d:%Y%m%d}T235900"]
+        else:
+            lines += [f"DTSTART;VALUE=DATE:{d:%Y%m%d}", f"DTEND;VALUE=DATE:{datetime.fromordinal(day + 1):%Y%m%d}"]
+        lines += [description[k:k + 75] if k == 0 else " " + description[k:k + 74]
+                  for k in [0] + list(range(75, len(description), 74))]
+        lines += ["SUMMARY:Beamtime", "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICS parser benchmark")
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    text = synthetic_feed(args.events)
+    print(f"feed: {len(text) / 1e6:.1f} MB, {args.events} events")
+
+    t0 = time.perf_counter()
+    old = parse_regex(text)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = list(ics_calendar.iter_ics_events(iter(text.splitlines())))
+    t_new = time.perf_counter() - t0
+
+    print(f"  regex    : {t_old:6.3f} s  {len(old)} events")
+    print(f"  streaming: {t_new:6.3f} s  {len(new)} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse, os, subprocess, sys
+
+# import report_gui 가 얼마나 걸리는지 (python -X importtime) 와 무거운 모듈이 딸려 오는지 확인
+# python bench_import_time.py                 (budget 넘거나 무거운 모듈이 import 되면 exit 1)
+# python bench_import_time.py --top 20 --budget-ms 300
+
+# 새 process 에서 잰 누적 import 시간 한도 (numpy 포함)
+import_budget_ms = 500
+# report_gui import 만으로는 올라오면 안 되는 모듈 (처음 쓸 때 import)
+lazy_modules = ("pandas", "matplotlib", "ipywidgets", "requests", "pytz", "dateutil")
+
+
+def import_times(module, repeat=5):
+    # returns ({module: (self us, cumulative us)} 중 제일 빠른 실행 것, import 된 모듈 이름들)
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                               f"import sys, {module}; print('\\n'.join(sys.modules))"],
+                              capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+        times = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+        if best is None or times[module][1] < best[module][1]:
+            best = times
+    return best, set(proc.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="import time benchmark")
+    parser.add_argument("--module", default="report_gui")
+    parser.add_argument("--budget-ms", type=float, default=import_budget_ms)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    times, loaded = import_times(args.module, args.repeat)
+    total_ms = times[args.module][1] / 1000
+    print(f"import {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:g} ms, best of {args.repeat})")
+    print(f"  {'self ms':>8} {'cum ms':>8}  module")
+    for name, (self_us, cumulative_us) in sorted(times.items(), key=lambda kv: -kv[1][0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} {cumulative_us / 1000:8.1f}  {name}")
+
+    eager = sorted(m for m in lazy_modules if m in loaded)
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms > {args.budget_ms:g} ms")
+    sys.exit(1 if eager or total_ms > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import numpy as np
+
+# --- plot 용 downsampling ---
+# 모든 함수는 남길 sample 의 index 배열 (시간순) 을 돌려줌. x 는 정렬된 float 배열 (예: epoch seconds)
+# NaN 은 값으로 고르지 않지만, NaN 구간의 첫 sample 은 남겨서 '-' 선이 그 구간을 잇지 않게 함
+
+
+def nan_breaks(y):
+    # NaN 구간마다 첫 index
+    nan = np.isnan(y)
+    return np.flatnonzero(nan & ~np.r_[False, nan][:-1])
+
+
+def point_budget(figsize, dpi, axes_fraction=0.8):
+    # axes 가로 pixel 수
+    return max(1, int(figsize[0] * dpi * axes_fraction))
+
+
+def stride_decimate(x, y, n_out):
+    step = max(1, int(np.ceil(len(x) / max(1, n_out))))
+    return np.arange(0, len(x), step)
+
+
+def minmax_decimate(x, y, n_buckets):
+    # pixel bucket 마다 min, max 두 점을 남김 -> 짧은 dropout 도 보임
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= 2 * n_buckets:
+        return np.union1d(valid, nan_breaks(y))
+    xv, yv = x[valid], y[valid]
+
+    span = xv[-1] - xv[0]
+    bucket = np.minimum(((xv - xv[0]) / (span or 1) * n_buckets).astype(np.int64), n_buckets - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    counts = np.diff(np.r_[starts, len(yv)])
+
+    mins = np.minimum.reduceat(yv, starts)
+    maxs = np.maximum.reduceat(yv, starts)
+    # bucket 안에서 min/max 값을 처음 만나는 위치
+    bucket_no = np.repeat(np.arange(len(starts)), counts)
+    is_min = np.flatnonzero(yv == np.repeat(mins, counts))
+    is_max = np.flatnonzero(yv == np.repeat(maxs, counts))
+    _, first_min = np.unique(bucket_no[is_min], return_index=True)
+    _, first_max = np.unique(bucket_no[is_max], return_index=True)
+    return np.union1d(valid[np.union1d(is_min[first_min], is_max[first_max])], nan_breaks(y))
+
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets (Steinarsson 2013). bucket 안의 면적 계산은 numpy 로 한 번에
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n_out >= n or n_out < 3:
+        return np.union1d(valid, nan_breaks(y))
+    xv, yv = x[valid], y[valid]
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        cx, cy = xv[nxt_lo:nxt_hi].mean(), yv[nxt_lo:nxt_hi].mean()
+        area = np.abs((xv[a] - cx) * (yv[lo:hi] - yv[a]) - (xv[a] - xv[lo:hi]) * (cy - yv[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return np.union1d(valid[out], nan_breaks(y))
+
+
+decimators = {
+    "stride": stride_decimate,
+    "minmax": minmax_decimate,
+    "lttb": lttb,
+}
+
+
+def decimate_df(df, n_points, method="minmax", x_col="Timestamp", y_col="Value1", max_gap=None):
+    # minmax 는 bucket 당 2 점이므로 n_points 를 pixel 수로 그대로 사용
+    # max_gap (seconds): 원래 sample 간격이 이보다 길면 양쪽 sample 을 남기고 그 사이에 NaN 행을 넣음
+    #                    (데이터가 없는 구간을 선으로 잇지 않도록)
+    if len(df) == 0 or (len(df) <= n_points and max_gap is None):
+        return df
+    x = (df[x_col] - df[x_col].iloc[0]).dt.total_seconds().to_numpy()
+    y = df[y_col].to_numpy(dtype=np.float64)
+    idx = decimators[method](x, y, n_points) if len(df) > n_points else np.arange(len(df))
+    if max_gap is None:
+        return df.iloc[idx]
+
+    gap = np.flatnonzero(np.diff(x) > max_gap)
+    if len(gap) == 0:
+        return df.iloc[idx]
+    idx = np.union1d(idx, np.r_[gap, gap + 1])
+    # gap 앞 sample 을 한 번 더 넣고 값만 NaN 으로 -> gap 앞 sample 바로 뒤에 위치
+    rows = np.r_[idx, gap]
+    order = np.argsort(np.r_[idx, gap + 0.5], kind="stable")
+    out = df.iloc[rows[order]].copy()
+    out[y_col] = np.where(order >= len(idx), np.nan, out[y_col].to_numpy(dtype=np.float64))
+    return out
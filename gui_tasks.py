@@ -0,0 +1,124 @@
+import html, threading, time, weakref
+import requests
+
+# --- report_gui() 의 background 작업 ---
+# archiver / calendar 요청을 notebook 을 멈추지 않고 thread 에서 돌리고, Cancel 로 진행 중인 HTTP 응답을 끊음
+
+
+class Cancelled(Exception):
+    pass
+
+
+class CancellableSession(requests.Session):
+    # cancel() 하면 진행 중인 응답을 닫고 (읽던 thread 는 예외로 빠져나옴), 이후 요청은 바로 Cancelled
+    def __init__(self, pool_size=32):
+        super().__init__()
+        self.mount("https://", requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._responses = weakref.WeakSet()
+
+    def send(self, request, **kwargs):
+        if self.cancelled.is_set():
+            raise Cancelled()
+        r = super().send(request, **kwargs)
+        with self._lock:
+            self._responses.add(r)
+        if self.cancelled.is_set():
+            r.close()
+            raise Cancelled()
+        return r
+
+    def cancel(self):
+        self.cancelled.set()
+        with self._lock:
+            responses = list(self._responses)
+        for r in responses:
+            try:
+                r.close()
+            except Exception:
+                pass
+
+
+class BackgroundTask:
+    # 한 번에 작업 하나만 (double click 으로 같은 fetch 가 두 번 돌지 않게). 실행 중에는 buttons 를 막음
+    # progress: IntProgress, status: HTML widget
+    def __init__(self, buttons, cancel_button, progress, status):
+        self.buttons = buttons
+        self.cancel_button = cancel_button
+        self.progress = progress
+        self.status = status
+        self.session = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._steps = {}
+        cancel_button.disabled = True
+        cancel_button.on_click(lambda _: self.cancel())
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, title, steps, work, done=None):
+        # work(session, update) 를 thread 에서 실행. update(step, status) 로 진행 상황 표시
+        # done(result, error) 는 끝나면 (취소 / 실패 포함) 같은 thread 에서 호출
+        # returns False: 이미 실행 중
+        with self._lock:
+            if self.running:
+                return False
+            self.session = CancellableSession()
+            self._steps = {step: "waiting" for step in steps}
+            self._title = title
+            self._t0 = time.perf_counter()
+            for button in self.buttons:
+                button.disabled = True
+            self.cancel_button.disabled = False
+            self.progress.max = max(1, len(self._steps))
+            self.progress.value = 0
+            self.progress.bar_style = "info"
+            self._render()
+            self._thread = threading.Thread(target=self._run, args=(self.session, work, done), daemon=True)
+            self._thread.start()
+        return True
+
+    def update(self, step, status):
+        self._steps[step] = status
+        self.progress.value = sum(s not in ("waiting", "running") for s in self._steps.values())
+        self._render()
+
+    def cancel(self):
+        if self.session is not None and self.running:
+            self.cancel_button.disabled = True
+            self._title += " (cancelling)"
+            self._render()
+            self.session.cancel()
+
+    def _run(self, session, work, done):
+        result = error = None
+        try:
+            result = work(session, self.update)
+        except Exception as e:
+            error = e
+        finally:
+            session.close()
+            if session.cancelled.is_set():
+                # calendar sync 처럼 실패를 모아서 돌려주는 작업도 취소로 표시
+                error = Cancelled()
+            outcome = "cancelled" if isinstance(error, Cancelled) else "failed" if error else "done"
+            self._steps = {step: outcome if status in ("waiting", "running") else status
+                           for step, status in self._steps.items()}
+            for button in self.buttons:
+                button.disabled = False
+            self.cancel_button.disabled = True
+            self.progress.bar_style = {"cancelled": "warning", "failed": "danger", "done": "success"}[outcome]
+            self._title += f": {outcome} in {time.perf_counter() - self._t0:.1f}s"
+            if outcome == "failed":
+                self._title += f" ({type(error).__name__}: {error})"
+            self._render()
+        if done is not None:
+            done(result, error)
+
+    def _render(self):
+        rows = "".join(f"<tr><td>{html.escape(str(step))}</td><td>{html.escape(status)}</td></tr>"
+                       for step, status in self._steps.items())
+        self.status.value = f"<b>{html.escape(self._title)}</b><table>{rows}</table>"
@@ -0,0 +1,380 @@
+import os, re, json, time, hashlib, sqlite3, threading
+from contextlib import closing
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import NamedTuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from lazy_import import lazy_import
+
+requests = lazy_import("requests")
+dateutil_rrule = lazy_import("dateutil.rrule")
+
+# --- ICS feed 로컬 캐시 ---
+# <cache>/<sha1(url)>.ics  : 받은 본문
+# <cache>/<sha1(url)>.json : ETag / Last-Modified / 받은 시각
+# <cache>/events.sqlite    : 파싱된 event (calendar, uid, recurrence_id) 별 한 줄, start/end index
+# max_age 안이면 요청 없이, 지나면 조건부 GET. 304 면 파싱/DB 갱신 없이 DB 에서 바로 조회
+ics_cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "xbdo_weeklyreport", "ics")
+ics_max_age = 10 * 60
+# archiver 처럼 네트워크가 안 될 때 오래된 캐시라도 쓸지
+ics_offline_fallback = True
+# parser 가 바뀌면 304 여도 store 를 다시 채워야 하므로 meta 에 같이 기록
+ics_parser_version = 3
+# calendar 들을 동시에 sync 할 때 새 store 의 WAL 전환 / table 생성이 겹치면 "database is locked" 가 남
+_schema_lock = threading.Lock()
+
+
+# --- 한 번에 한 줄씩 읽는 ICS parser (RFC 5545) ---
+# 접힌 줄 (공백/탭으로 시작) 을 이어 붙이고, DTSTART/DTEND 의 UTC(Z), TZID=, VALUE=DATE, floating 형식을 모두 처리
+ics_default_tz = "America/Los_Angeles"
+_duration_re = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+@lru_cache(maxsize=None)
+def _zone(tzid):
+    # pytz localize 보다 훨씬 빠름 (event 마다 호출되므로)
+    try:
+        return ZoneInfo(tzid.strip('"'))
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def _split_property(line):
+    # "NAME;P1=a;P2=b:value" -> (NAME, {P1: a, P2: b}, value). param 값의 따옴표 안 ':' 은 무시
+    if '"' in line:
+        quoted, cut = False, len(line)
+        for i, c in enumerate(line):
+            if c == '"':
+                quoted = not quoted
+            elif c == ":" and not quoted:
+                cut = i
+                break
+        head, value = line[:cut], line[cut + 1:]
+    else:
+        head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    return name.upper(), dict(p.partition("=")[::2] for p in params), value
+
+
+def _parse_ics_time(value, params, default_tz):
+    # returns (epoch seconds, all-day 여부, 반복 계산에 쓸 time zone 이름)
+    v = value.strip()
+    if params.get("VALUE") == "DATE" or len(v) == 8:
+        return datetime(int(v[0:4]), int(v[4:6]), int(v[6:8]), tzinfo=default_tz).timestamp(), True, default_tz.key
+    if len(v) < 15 or v[8] != "T":
+        raise ValueError(f"bad ICS date-time {v!r}")
+    dt = datetime(int(v[0:4]), int(v[4:6]), int(v[6:8]), int(v[9:11]), int(v[11:13]), int(v[13:15]))
+    if v.endswith("Z"):
+        return dt.replace(tzinfo=timezone.utc).timestamp(), False, "UTC"
+    zone = (_zone(params["TZID"]) if "TZID" in params else None) or default_tz
+    return dt.replace(tzinfo=zone).timestamp(), False, zone.key
+
+
+def _parse_duration(value):
+    m = _duration_re.match(value.strip())
+    if not m:
+        return None
+    sign, w, d, h, mi, sec = m.groups()
+    seconds = (int(w or 0) * 7 + int(d or 0)) * 86400 + int(h or 0) * 3600 + int(mi or 0) * 60 + int(sec or 0)
+    return -seconds if sign == "-" else seconds
+
+
+# 나머지 property (DESCRIPTION 등) 는 접힌 줄까지 통째로 건너뜀
+_wanted_properties = ("BEGIN", "END", "DTSTART", "DTEND", "RECURRENCE-ID", "UID", "SEQUENCE", "DURATION", "STATUS",
+                      "RRULE", "EXDATE", "X-WR-TIMEZONE")
+
+
+class IcsEvent(NamedTuple):
+    uid: str
+    recurrence_id: str     # override 면 원래 occurrence 의 start epoch, 아니면 ""
+    sequence: int
+    start: float
+    end: float
+    cancelled: bool        # 취소된 occurrence override (반복에서 빼기만 함)
+    rrule: str             # 반복 event 의 RRULE, 아니면 ""
+    exdates: tuple         # EXDATE epoch 들
+    tzid: str
+
+
+def _unfold(lines):
+    current = None
+    for line in lines:
+        first = line[:1]
+        if first == " " or first == "\t":
+            if current is not None:
+                current += line[1:].rstrip("\r")
+            continue
+        if current:
+            yield current
+        current = line.rstrip("\r") if line.startswith(_wanted_properties) or ":" not in line else None
+    if current:
+        yield current
+
+
+def iter_ics_events(lines, default_tz=None):
+    # lines: str 줄의 iterable (응답 iterator 그대로 가능). 한 번만 훑음
+    # yields IcsEvent
+    default_tz = _zone(default_tz or ics_default_tz)
+    ev = None
+    for line in _unfold(lines):
+        name, params, value = _split_property(line)
+        if ev is None:
+            if name == "BEGIN" and value.upper() == "VEVENT":
+                ev = {}
+            elif name == "X-WR-TIMEZONE":
+                default_tz = _zone(value.strip()) or default_tz
+            continue
+        if name == "END" and value.upper() == "VEVENT":
+            event = _finish_event(ev)
+            ev = None
+            if event is not None:
+                yield event
+        elif name in ("DTSTART", "DTEND", "RECURRENCE-ID"):
+            try:
+                ev[name] = _parse_ics_time(value, params, default_tz)
+            except ValueError:
+                pass
+        elif name == "EXDATE":
+            for v in value.split(","):
+                try:
+                    ev.setdefault("EXDATE", []).append(_parse_ics_time(v, params, default_tz)[0])
+                except ValueError:
+                    pass
+        elif name in ("UID", "SEQUENCE", "DURATION", "STATUS", "RRULE"):
+            ev[name] = value.strip()
+
+
+def _finish_event(ev):
+    cancelled = ev.get("STATUS", "").upper() == "CANCELLED"
+    if "DTSTART" not in ev or (cancelled and "RECURRENCE-ID" not in ev):
+        return None
+    start, all_day, tzid = ev["DTSTART"]
+    if "DTEND" in ev:
+        end = ev["DTEND"][0]
+    elif _parse_duration(ev.get("DURATION", "")) is not None:
+        end = start + _parse_duration(ev["DURATION"])
+    else:
+        end = start + (86400 if all_day else 0)
+    uid = ev.get("UID") or f"nouid:{start}:{end}"
+    rid = str(ev["RECURRENCE-ID"][0]) if "RECURRENCE-ID" in ev else ""
+    seq = int(ev["SEQUENCE"]) if ev.get("SEQUENCE", "").isdigit() else 0
+    return IcsEvent(uid, rid, seq, start, end, cancelled, ev.get("RRULE", ""), tuple(ev.get("EXDATE", ())), tzid)
+
+
+def parse_ics_events(text, default_tz=None):
+    return list(iter_ics_events(text.splitlines(), default_tz))
+
+
+def iter_response_lines(r, sink=None, chunk_size=1 << 16):
+    # 응답을 chunk 단위로 읽으면서 줄로 잘라줌. sink 가 있으면 받은 그대로 같이 기록
+    pending = b""
+    for chunk in r.iter_content(chunk_size=chunk_size):
+        if sink is not None:
+            sink.write(chunk)
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8", "replace")
+    if pending:
+        yield pending.decode("utf-8", "replace")
+
+
+# --- RRULE 반복 펼치기 ---
+def _rule_after(rrule, start, tzid, after):
+    # start 를 DTSTART 로 하는 rule 의 occurrence 를 after 이후부터 하나씩 (epoch).
+    # 시간대 안에서 (DST 포함) 계산. UNTIL 형식이 DTSTART 와 안 맞으면 wall time 기준으로 다시 시도
+    zone = _zone(tzid) or timezone.utc
+    dtstart = datetime.fromtimestamp(start, zone)
+    try:
+        rule = dateutil_rrule.rrulestr(rrule, dtstart=dtstart)
+        for occ in rule.xafter(datetime.fromtimestamp(after, zone), inc=True):
+            yield occ.timestamp()
+    except ValueError:
+        rule = dateutil_rrule.rrulestr(rrule, dtstart=dtstart.replace(tzinfo=None), ignoretz=True)
+        for occ in rule.xafter(datetime.fromtimestamp(after, zone).replace(tzinfo=None), inc=True):
+            yield occ.replace(tzinfo=zone).timestamp()
+
+
+def expand_occurrences(start, end, rrule, exdates, tzid, t0, t1, skip=()):
+    # [t0, t1] 와 겹치는 occurrence 만 lazy 하게 만들어 줌. 창 뒤로 넘어가면 멈춤
+    # skip: EXDATE 와 RECURRENCE-ID override 가 있는 occurrence 의 start epoch
+    duration = end - start
+    excluded = {round(t) for t in exdates} | {round(t) for t in skip}
+    for occ in _rule_after(rrule, start, tzid, max(start, t0 - duration)):
+        if occ > t1:
+            break
+        if round(occ) not in excluded:
+            yield occ, occ + duration
+
+
+def _rule_until(rrule, start, tzid):
+    # 마지막 occurrence 의 start (UNTIL/COUNT 가 없으면 None = 끝없음)
+    upper = rrule.upper()
+    if "UNTIL=" not in upper and "COUNT=" not in upper:
+        return None
+    last = None
+    for last in _rule_after(rrule, start, tzid, start):
+        pass
+    return last if last is not None else start
+
+
+# --- event store (SQLite) ---
+def _store_path(cache_dir=None):
+    return os.path.join(cache_dir or ics_cache_dir, "events.sqlite")
+
+
+def _connect(cache_dir=None):
+    path = _store_path(cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    con = sqlite3.connect(path, timeout=60)
+    with _schema_lock:
+        con.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in con.execute("PRAGMA table_info(events)")]
+        if columns and "rrule" not in columns:
+            # 예전 형식의 store: 지우면 ics_parser_version 때문에 feed 를 다시 받아서 채움
+            con.execute("DROP TABLE events")
+            con.execute("DROP TABLE IF EXISTS calendars")
+        con.execute("""CREATE TABLE IF NOT EXISTS events (
+                           calendar TEXT, uid TEXT, recurrence_id TEXT, sequence INTEGER, start REAL, end REAL,
+                           cancelled INTEGER, rrule TEXT, exdates TEXT, tzid TEXT, until REAL,
+                           PRIMARY KEY (calendar, uid, recurrence_id)) WITHOUT ROWID""")
+        con.execute("CREATE INDEX IF NOT EXISTS events_start ON events (calendar, start)")
+        # 창 조회 때 start 범위를 좁히려고 calendar 별 가장 긴 event 길이를 따로 둠
+        con.execute("CREATE TABLE IF NOT EXISTS calendars (calendar TEXT PRIMARY KEY, max_duration REAL)")
+    return con
+
+
+def update_store(calendar, events, cache_dir=None):
+    # feed 전체를 받았을 때: 바뀐 event 만 upsert, feed 에서 사라진 event 는 삭제
+    # returns (추가/변경 수, 삭제 수)
+    with closing(_connect(cache_dir)) as con, con:
+        stored = {(uid, rid): (seq, start, end, bool(cancelled), rrule, tuple(json.loads(exdates)), tzid)
+                  for uid, rid, seq, start, end, cancelled, rrule, exdates, tzid in
+                  con.execute("""SELECT uid, recurrence_id, sequence, start, end, cancelled, rrule, exdates, tzid
+                                 FROM events WHERE calendar = ?""", (calendar,))}
+        changed = []
+        for ev in events:
+            old = stored.pop((ev.uid, ev.recurrence_id), None)
+            if old is None or (ev.sequence >= old[0] and tuple(ev[2:]) != old):
+                until = _rule_until(ev.rrule, ev.start, ev.tzid) if ev.rrule else ev.start
+                changed.append((calendar, ev.uid, ev.recurrence_id, ev.sequence, ev.start, ev.end, int(ev.cancelled),
+                                ev.rrule, json.dumps(list(ev.exdates)), ev.tzid, until))
+        con.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", changed)
+        con.executemany("DELETE FROM events WHERE calendar = ? AND uid = ? AND recurrence_id = ?",
+                        [(calendar, uid, rid) for uid, rid in stored])
+        max_duration = con.execute("SELECT max(end - start) FROM events WHERE calendar = ?",
+                                   (calendar,)).fetchone()[0] or 0
+        con.execute("INSERT OR REPLACE INTO calendars VALUES (?, ?)", (calendar, max_duration))
+    return len(changed), len(stored)
+
+
+def _in_store(calendar, cache_dir=None):
+    with closing(_connect(cache_dir)) as con, con:
+        return con.execute("SELECT 1 FROM calendars WHERE calendar = ?", (calendar,)).fetchone() is not None
+
+
+def query_events(calendar, t0, t1, cache_dir=None):
+    # [t0, t1] 와 겹치는 event (uid, start, end), start 순
+    # 단일 event: start 가 [t0 - max_duration, t1] 인 행만 index 로 읽음
+    # 반복 event: 창 안에 occurrence 가 있을 수 있는 master 만 골라서 창 안에서만 펼침
+    with closing(_connect(cache_dir)) as con, con:
+        row = con.execute("SELECT max_duration FROM calendars WHERE calendar = ?", (calendar,)).fetchone()
+        if row is None:
+            return []
+        events = con.execute("""SELECT uid, start, end FROM events
+                                WHERE calendar = ? AND start >= ? AND start <= ? AND end >= ?
+                                      AND rrule = '' AND NOT cancelled""",
+                             (calendar, t0 - row[0], t1, t0)).fetchall()
+        masters = con.execute("""SELECT uid, start, end, rrule, exdates, tzid FROM events
+                                 WHERE calendar = ? AND rrule != '' AND start <= ?
+                                       AND (until IS NULL OR until + (end - start) >= ?)""",
+                              (calendar, t1, t0)).fetchall()
+        for uid, start, end, rrule, exdates, tzid in masters:
+            overridden = [float(rid) for (rid,) in con.execute(
+                "SELECT recurrence_id FROM events WHERE calendar = ? AND uid = ? AND recurrence_id != ''",
+                (calendar, uid))]
+            events.extend((uid, occ_start, occ_end) for occ_start, occ_end in
+                          expand_occurrences(start, end, rrule, json.loads(exdates), tzid, t0, t1, overridden))
+    return sorted(events, key=lambda ev: ev[1])
+
+
+def _cache_paths(url, cache_dir=None):
+    base = os.path.join(cache_dir or ics_cache_dir, hashlib.sha1(url.encode()).hexdigest())
+    return base + ".ics", base + ".json"
+
+
+def _load_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def refresh_feed(url, session=None, timeout=30, max_age=None, cache_dir=None):
+    # returns "cache" | "304" | "200" | "stale"
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    max_age = ics_max_age if max_age is None else max_age
+    meta = _load_meta(meta_path)
+    if meta is not None and (meta.get("parser") != ics_parser_version or not _in_store(url, cache_dir)):
+        # store 가 지워졌거나 예전 parser 의 캐시: 조건부 GET 없이 전체를 다시 받음
+        meta = None
+    if meta is not None and time.time() - meta["fetched"] < max_age:
+        return "cache"
+
+    headers = {}
+    if meta is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        r = (session or requests).get(url, headers=headers, timeout=timeout, stream=True)
+        if r.status_code != 304:
+            r.raise_for_status()
+    except requests.RequestException:
+        if meta is not None and ics_offline_fallback:
+            return "stale"
+        raise
+
+    if r.status_code == 304 and meta is not None:
+        r.close()
+        meta["fetched"] = time.time()
+        status = "304"
+    else:
+        # 본문 저장과 파싱을 응답 stream 한 번으로
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        tmp = f"{body_path}.{os.getpid()}.tmp"
+        try:
+            with r, open(tmp, "wb") as body:
+                events = list(iter_ics_events(iter_response_lines(r, sink=body)))
+            os.replace(tmp, body_path)
+        finally:
+            # 받는 중에 취소 / 실패하면 반쯤 받은 파일이 남지 않게
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        update_store(url, events, cache_dir)
+        meta = {
+            "url": url,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "fetched": time.time(),
+            "parser": ics_parser_version,
+        }
+        status = "200"
+    _write_atomic(meta_path, json.dumps(meta))
+    return status
+
+
+def get_events(url, t0, t1, session=None, timeout=30, max_age=None, cache_dir=None):
+    # returns ([(uid, start, end)] in [t0, t1], refresh status)
+    status = refresh_feed(url, session=session, timeout=timeout, max_age=max_age, cache_dir=cache_dir)
+    return query_events(url, t0, t1, cache_dir), status
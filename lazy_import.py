@@ -0,0 +1,24 @@
+import importlib, sys
+
+# --- 무거운 모듈은 처음 쓸 때 import ---
+# pd = lazy_import("pandas") 처럼 module 자리에 두면, 속성을 처음 읽을 때 실제로 import 됨
+
+
+class _LazyModule:
+    def __init__(self, name):
+        self._lazy_name = name
+        self._lazy_module = None
+
+    def __getattr__(self, attr):
+        # 여기는 instance 에 없는 속성일 때만 불림
+        if self._lazy_module is None:
+            self._lazy_module = importlib.import_module(self._lazy_name)
+        return getattr(self._lazy_module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._lazy_name!r}>"
+
+
+def lazy_import(name):
+    # 이미 import 된 module 이면 그대로 돌려줌
+    return sys.modules.get(name) or _LazyModule(name)
@@ -0,0 +1,108 @@
+import itertools, os, sqlite3, threading, time
+from contextlib import closing
+import numpy as np
+from lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+# --- 로컬 PV 샘플 캐시 (SQLite) ---
+# samples : (pv, ts, value)  ts = epoch seconds (UTC)
+# coverage: (pv, start, end) 이미 archiver 에서 받아온 구간
+pv_cache_path = os.path.join(os.path.expanduser("~"), ".cache", "xbdo_weeklyreport", "pv_cache.sqlite")
+# archiver 에 아직 안 들어왔을 수 있는 최근 구간은 coverage 로 기록하지 않음
+pv_cache_settle = 15 * 60
+# store 에서 한 번에 Python tuple 로 바꾸는 샘플 수 (메모리가 샘플 수에 비례해 늘지 않게)
+pv_cache_block = 1 << 16
+# 새 파일에 여러 thread 가 동시에 WAL 전환 / table 생성을 하면 busy timeout 없이 "database is locked" 가 남
+_schema_lock = threading.Lock()
+
+
+def _connect(path=None):
+    path = path or pv_cache_path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    con = sqlite3.connect(path, timeout=60)
+    with _schema_lock:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("CREATE TABLE IF NOT EXISTS samples (pv TEXT, ts REAL, value REAL, PRIMARY KEY (pv, ts)) "
+                    "WITHOUT ROWID")
+        con.execute("CREATE TABLE IF NOT EXISTS coverage (pv TEXT, start REAL, end REAL)")
+        con.execute("CREATE INDEX IF NOT EXISTS coverage_pv ON coverage (pv, start)")
+    return con
+
+
+def _merge_intervals(intervals):
+    merged = []
+    for s, e in sorted(intervals):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return [tuple(iv) for iv in merged]
+
+
+def missing_ranges(pv, start, end, path=None):
+    # [start, end] 중 캐시에 없는 구간 목록 (epoch seconds)
+    with closing(_connect(path)) as con, con:
+        rows = con.execute("SELECT start, end FROM coverage WHERE pv = ? AND end >= ? AND start <= ?",
+                           (pv, start, end)).fetchall()
+    gaps = []
+    t = start
+    for s, e in _merge_intervals(rows):
+        if s > t:
+            gaps.append((t, min(s, end)))
+        t = max(t, e)
+        if t >= end:
+            break
+    if t < end:
+        gaps.append((t, end))
+    return gaps
+
+
+def _sample_rows(pv, ts, values):
+    # executemany 에 넘길 (pv, ts, value) 를 block 단위로 만듦
+    for i in range(0, len(ts), pv_cache_block):
+        yield from zip(itertools.repeat(pv), ts[i:i + pv_cache_block].tolist(),
+                       values[i:i + pv_cache_block].tolist())
+
+
+def store(pv, start, end, df, path=None, settle=None):
+    # df: fetch_pv_data_as_df 결과 (Timestamp, Value1)
+    settled = time.time() - (pv_cache_settle if settle is None else settle)
+    ts = (df["Timestamp"] - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy() if len(df) else np.empty(0)
+    values = pd.to_numeric(df["Value1"], errors="coerce").to_numpy(dtype=float) if len(df) else np.empty(0)
+    with closing(_connect(path)) as con, con:
+        con.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?)", _sample_rows(pv, ts, values))
+        end = min(end, settled)
+        if end <= start:
+            return
+        rows = con.execute("SELECT start, end FROM coverage WHERE pv = ? AND end >= ? AND start <= ?",
+                           (pv, start, end)).fetchall()
+        merged = _merge_intervals(rows + [(start, end)])
+        con.execute("DELETE FROM coverage WHERE pv = ? AND end >= ? AND start <= ?", (pv, start, end))
+        con.executemany("INSERT INTO coverage VALUES (?, ?, ?)", [(pv, s, e) for s, e in merged])
+
+
+def load(pv, start, end, path=None, tz="America/Los_Angeles"):
+    # archiver 처럼 start 직전 샘플 하나도 같이 돌려줌 (cache 를 거친 report 와 안 거친 report 가 같은 값으로 시작)
+    # cursor 를 바로 numpy 배열로 읽음 (row tuple 목록을 만들지 않음)
+    with closing(_connect(path)) as con, con:
+        before = con.execute("SELECT ts, value FROM samples WHERE pv = ? AND ts < ? ORDER BY ts DESC LIMIT 1",
+                             (pv, start)).fetchall()
+        cursor = con.execute("SELECT ts, value FROM samples WHERE pv = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                             (pv, start, end))
+        arr = np.fromiter(itertools.chain.from_iterable(itertools.chain(before, cursor)), dtype=float)
+    arr = arr.reshape(-1, 2)
+    return pd.DataFrame({
+        "Timestamp": pd.to_datetime(arr[:, 0], unit="s", utc=True).tz_convert(tz),
+        "Value1": arr[:, 1],
+    })
+
+
+def clear(pv=None, path=None):
+    with closing(_connect(path)) as con, con:
+        if pv is None:
+            con.execute("DELETE FROM samples")
+            con.execute("DELETE FROM coverage")
+        else:
+            con.execute("DELETE FROM samples WHERE pv = ?", (pv,))
+            con.execute("DELETE FROM coverage WHERE pv = ?", (pv,))
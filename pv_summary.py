@@ -0,0 +1,132 @@
+import os, sqlite3, time
+from contextlib import closing
+import numpy as np
+from lazy_import import lazy_import
+
+import beam_stats
+
+pd = lazy_import("pandas")
+
+# --- PV 요약 (시간/일 단위 aggregate) 로컬 저장 ---
+# 긴 기간 (분기, 1 년) 은 raw 샘플 대신 이 요약으로 그림. 한 번 계산한 bin 은 다시 받지 않음
+# summary: (pv, resolution, threshold, start) -> count, mean, min, max, p05, p50, p95, covered, above
+#   covered / above: 데이터가 있던 시간 / threshold 이상이던 시간 (seconds, beam_stats 와 같은 적분)
+pv_summary_path = os.path.join(os.path.expanduser("~"), ".cache", "xbdo_weeklyreport", "pv_summary.sqlite")
+# bin 이 끝나고 이만큼 지나야 저장 (archiver 에 아직 안 들어온 샘플)
+pv_summary_settle = 15 * 60
+summary_percentiles = (5, 50, 95)
+summary_columns = ["count", "mean", "min", "max", "p05", "p50", "p95", "covered", "above"]
+# resolution -> pandas freq (bin 경계는 LA 시간 기준)
+summary_resolutions = {"hour": "h", "day": "D"}
+summary_tz = "America/Los_Angeles"
+
+
+def _connect(path=None):
+    path = path or pv_summary_path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    con = sqlite3.connect(path, timeout=60)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""CREATE TABLE IF NOT EXISTS summary (
+                       pv TEXT, resolution TEXT, threshold REAL, start REAL, end REAL,
+                       count INTEGER, mean REAL, min REAL, max REAL, p05 REAL, p50 REAL, p95 REAL,
+                       covered REAL, above REAL,
+                       PRIMARY KEY (pv, resolution, threshold, start)) WITHOUT ROWID""")
+    return con
+
+
+def bin_edges(start, end, resolution):
+    # [start, end] 를 덮는 bin 의 (starts, ends) epoch 배열. 하루 bin 은 LA 자정 기준 (DST 날은 23/25 시간)
+    freq = summary_resolutions[resolution]
+    t0 = pd.Timestamp(start, unit="s", tz="UTC").tz_convert(summary_tz).floor(freq, ambiguous=True,
+                                                                              nonexistent="shift_backward")
+    t1 = pd.Timestamp(end, unit="s", tz="UTC").tz_convert(summary_tz)
+    edges = pd.date_range(t0, t1 + pd.Timedelta(1, freq), freq=freq)
+    edges = (edges - pd.Timestamp(0, tz="UTC")).total_seconds().to_numpy()
+    return edges[:-1], edges[1:]
+
+
+def summarize(t, v, starts, ends, threshold, max_gap=None):
+    # 정렬된 샘플 (t, v) 를 bin 별로 집계. returns {column: array} (bin 수 길이)
+    n_bins = len(starts)
+    out = {c: np.full(n_bins, np.nan) for c in summary_columns}
+    t = np.asarray(t, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    covered, above = beam_stats.Integral(t, v, threshold, max_gap).between(starts, ends)
+    out["covered"], out["above"] = covered, above
+
+    ok = ~np.isnan(v)
+    t, v = t[ok], v[ok]
+    b = np.searchsorted(ends, t, side="right")
+    inside = (b < n_bins) & (t >= starts[np.minimum(b, n_bins - 1)])
+    b, v = b[inside], v[inside]
+    counts = np.bincount(b, minlength=n_bins)
+    out["count"] = counts.astype(np.float64)
+    if len(v) == 0:
+        return out
+
+    # bin 안에서 값 순으로 정렬하면 min/max/percentile 이 index 로 바로 나옴
+    order = np.lexsort((v, b))
+    b, v = b[order], v[order]
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+    out["mean"][has] = np.bincount(b, weights=v, minlength=n_bins)[has] / counts[has]
+    out["min"][has] = v[first[has]]
+    out["max"][has] = v[first[has] + counts[has] - 1]
+    for p, col in zip(summary_percentiles, ("p05", "p50", "p95")):
+        out[col][has] = v[first[has] + np.floor((counts[has] - 1) * p / 100).astype(np.int64)]
+    return out
+
+
+def missing_bins(pv, start, end, resolution, threshold, path=None):
+    # 아직 저장 안 된 (다 끝난) bin 들의 (starts, ends)
+    starts, ends = bin_edges(start, end, resolution)
+    settled = ends <= time.time() - pv_summary_settle
+    starts, ends = starts[settled], ends[settled]
+    with closing(_connect(path)) as con, con:
+        have = {s for (s,) in con.execute(
+            "SELECT start FROM summary WHERE pv = ? AND resolution = ? AND threshold = ? AND start >= ? AND start <= ?",
+            (pv, resolution, threshold, start - 2 * 86400, end))}
+    keep = np.array([s not in have for s in starts.tolist()], dtype=bool)
+    return starts[keep], ends[keep]
+
+
+def store(pv, resolution, threshold, starts, ends, summary, path=None):
+    rows = zip([pv] * len(starts), [resolution] * len(starts), [threshold] * len(starts),
+               starts.tolist(), ends.tolist(), *[summary[c].tolist() for c in summary_columns])
+    with closing(_connect(path)) as con, con:
+        con.executemany(f"INSERT OR REPLACE INTO summary VALUES ({', '.join('?' * 14)})", rows)
+
+
+def load(pv, resolution, threshold, start, end, path=None, tz=None):
+    # returns DataFrame: Timestamp (bin start), End, count, mean, ..., covered, above (seconds)
+    with closing(_connect(path)) as con, con:
+        rows = con.execute(f"""SELECT start, end, {', '.join(summary_columns)} FROM summary
+                               WHERE pv = ? AND resolution = ? AND threshold = ? AND end > ? AND start < ?
+                               ORDER BY start""", (pv, resolution, threshold, start, end)).fetchall()
+    arr = np.array(rows, dtype=float).reshape(-1, 2 + len(summary_columns))
+    df = pd.DataFrame(arr[:, 2:], columns=summary_columns)
+    df.insert(0, "End", pd.to_datetime(arr[:, 1], unit="s", utc=True).tz_convert(tz or summary_tz))
+    df.insert(0, "Timestamp", pd.to_datetime(arr[:, 0], unit="s", utc=True).tz_convert(tz or summary_tz))
+    return df
+
+
+def rollup(df, freq):
+    # 저장된 bin 을 더 큰 단위로 합침 (freq: "W", "MS", "QS", "YS" ...)
+    # count/min/max/covered/above 는 정확, mean 은 count 가중 평균, percentile 은 bin 값들의 중앙값 (근사)
+    if len(df) == 0:
+        return df.copy()
+    grouped = df.assign(weighted=df["mean"] * df["count"]).groupby(pd.Grouper(key="Timestamp", freq=freq))
+    out = grouped.agg(End=("End", "max"), count=("count", "sum"), weighted=("weighted", "sum"),
+                      min=("min", "min"), max=("max", "max"), p05=("p05", "median"), p50=("p50", "median"),
+                      p95=("p95", "median"), covered=("covered", "sum"), above=("above", "sum"))
+    out["mean"] = out["weighted"] / out["count"].where(out["count"] > 0)
+    out = out.drop(columns="weighted").reset_index()
+    return out[["Timestamp", "End"] + summary_columns]
+
+
+def clear(pv=None, path=None):
+    with closing(_connect(path)) as con, con:
+        if pv is None:
+            con.execute("DELETE FROM summary")
+        else:
+            con.execute("DELETE FROM summary WHERE pv = ?", (pv,))
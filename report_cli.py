@@ -0,0 +1,171 @@
+import argparse, csv, os, sys, threading, time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Jupyter/ipywidgets 없이 report 를 파일로 저장 (cron 용)
+# python report_cli.py --end "2025-09-15 23:59" --period 7d -o weekly.png
+# python report_cli.py --period 7d -o weekly.pdf --comments comments.csv   (end 생략 시 오늘 23:59)
+# 여러 주를 한 번에 (process pool):
+# python report_cli.py --job "2025-09-08 23:59,7d" --job "2025-09-15 23:59,7d" -o "reports/weekly_{date}.png"
+# python report_cli.py --jobs jobs.csv -o "reports/weekly_{date}_{period}.pdf" --workers 4
+import matplotlib
+matplotlib.use("Agg")
+
+import report_gui, pv_cache, ics_calendar, schedule
+
+output_formats = (".png", ".pdf", ".svg")
+# batch 에서 동시에 그리는 process 수 (None: CPU 수)
+batch_workers = None
+
+
+def read_comments(path):
+    # CSV: start ("%Y-%m-%d %H:%M"), minutes, issue, hutch  (header 줄은 있어도 되고 없어도 됨)
+    comments = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 4 or not row[1].strip().isdigit():
+                continue
+            comments.append((row[0].strip(), int(row[1]), row[2].strip(), row[3].strip()))
+    return comments
+
+
+def read_jobs(path):
+    # CSV: end ("%Y-%m-%d %H:%M[:%S]"), period
+    with open(path, newline="") as f:
+        return [(row[0].strip(), row[1].strip()) for row in csv.reader(f)
+                if len(row) >= 2 and row[0].strip()[:1].isdigit()]
+
+
+def job_output(pattern, end_date, period):
+    # {date}: end 날짜, {period}: "7d" 등
+    return pattern.format(date=end_date.split()[0], period=period)
+
+
+def run(end_date, period, output, sync=True, comment_patches=(), binned=False, render=None, hutch_patches=None):
+    # returns (program 수, seconds)
+    t0 = time.perf_counter()
+    hutch_patches = (schedule.Schedule() if hutch_patches is None
+                     else schedule.as_schedule(hutch_patches, with_issue=False).copy())
+    if sync:
+        count, timings, failures = report_gui.sync_hutch_from_calendar_noics(end_date, period, hutch_patches,
+                                                                            details=True)
+        print(f"{count} events synced from {len(timings) - len(failures)} calendars")
+        for hutch, error in failures.items():
+            print(f"  {hutch} calendar failed: {error}", file=sys.stderr)
+    for start, minutes, hutch, other in report_gui.program_conflicts(hutch_patches):
+        print(f"  HXR conflict: {start} {minutes} min {hutch} / {other}", file=sys.stderr)
+    comments = schedule.as_schedule(comment_patches, with_issue=True)
+    report_gui.report_range(end_date, period, hutch_patches=hutch_patches, comment_patches=comments,
+                            binned=binned, render=render, output=output)
+    return len(hutch_patches), time.perf_counter() - t0
+
+
+def _init_worker(cache_path, calendar_dir, max_connections):
+    # worker 도 부모와 같은 PV cache / calendar store 를 씀 (spawn 이어도)
+    # archiver 연결 수는 worker 들이 나눠 가짐 (batch 전체가 fetch_max_connections 안에서)
+    pv_cache.pv_cache_path = cache_path
+    ics_calendar.ics_cache_dir = calendar_dir
+    report_gui.fetch_max_connections = max_connections
+    report_gui._fetch_slots = threading.BoundedSemaphore(max_connections)
+
+
+def prefill_cache(jobs, binned=False):
+    # job 들의 archiver 데이터를 부모에서 하나씩 차례로 pv_cache 에 받아 둠. 앞 job 이 받은 구간은 cache 에서 나오므로
+    # 겹치는 구간은 한 번만 받고, worker 들이 같은 gap 을 동시에 받지 않음 (settle 안의 최근 구간만 worker 가 다시 받음)
+    # returns {(end_date, period): error message} (실패한 job 은 worker 에서 다시 시도)
+    failed = {}
+    if not report_gui.fetch_use_cache:
+        return failed
+    for end_date, period in jobs:
+        start_time, end_time, fetch_args = report_gui.report_fetch_args(end_date, period, binned)
+        try:
+            report_gui.fetch_all_pvs(start_time, end_time, **fetch_args)
+        except Exception as e:
+            failed[end_date, period] = f"{type(e).__name__}: {e}"
+            print(f"  {end_date} {period}: prefetch failed: {failed[end_date, period]}", file=sys.stderr)
+    return failed
+
+
+def run_batch(jobs, output_pattern, sync=True, comment_patches=(), binned=False, render=None, workers=None):
+    # jobs: [(end_date, period)]. calendar 는 부모에서 한 번 받아 store 에서 job 별로 조회하고,
+    # archiver 데이터도 부모에서 pv_cache 에 미리 받아 둠 (prefill_cache). 그림은 process pool 에서 cache 를 읽어 그림
+    # returns {output: error message} (실패한 job 만)
+    t0 = time.perf_counter()
+    programs = {}
+    for end_date, period in jobs:
+        hutch_patches = schedule.Schedule()
+        if sync:
+            count, timings, failures = report_gui.sync_hutch_from_calendar_noics(
+                end_date, period, hutch_patches, details=True)
+            for hutch, error in failures.items():
+                print(f"  {end_date} {period}: {hutch} calendar failed: {error}", file=sys.stderr)
+        programs[end_date, period] = hutch_patches
+    t_sync = time.perf_counter() - t0
+    prefill_cache(jobs, binned)
+    t_fetch = time.perf_counter() - t0 - t_sync
+
+    failed = {}
+    n_programs = 0
+    workers = max(1, min(workers or batch_workers or os.cpu_count(), len(jobs)))
+    max_connections = max(1, report_gui.fetch_max_connections // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(pv_cache.pv_cache_path, ics_calendar.ics_cache_dir, max_connections)) as pool:
+        futures = {}
+        for end_date, period in jobs:
+            output = job_output(output_pattern, end_date, period)
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            futures[pool.submit(run, end_date, period, output, False, list(comment_patches), binned, render,
+                                programs[end_date, period])] = output
+        for fut in as_completed(futures):
+            output = futures[fut]
+            try:
+                count, seconds = fut.result()
+                n_programs += count
+                print(f"wrote {output} ({count} programs) in {seconds:.1f}s")
+            except Exception as e:
+                failed[output] = f"{type(e).__name__}: {e}"
+                print(f"failed {output}: {failed[output]}", file=sys.stderr)
+
+    total = time.perf_counter() - t0
+    done = len(jobs) - len(failed)
+    print(f"{done}/{len(jobs)} reports in {total:.1f}s (calendar sync {t_sync:.1f}s, archiver {t_fetch:.1f}s, "
+          f"{done / total * 60 if total else 0:.1f} reports/min, {n_programs} programs)")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XBDO weekly report without Jupyter")
+    parser.add_argument("--end", default=datetime.today().strftime("%Y-%m-%d 23:59"),
+                        help='report end, "YYYY-MM-DD HH:MM[:SS]" (America/Los_Angeles)')
+    parser.add_argument("--period", default="7d", help="'Nd' or 'Nh'")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output file (.png, .pdf, .svg); with --job/--jobs a pattern using {date} and {period}")
+    parser.add_argument("--job", action="append", default=[], help='batch job "END,PERIOD" (repeatable)')
+    parser.add_argument("--jobs", default=None, help="batch job CSV: end, period")
+    parser.add_argument("--workers", type=int, default=None, help="processes for batch rendering")
+    parser.add_argument("--no-sync", action="store_true", help="do not read the hutch calendars")
+    parser.add_argument("--comments", default=None, help="comment CSV: start, minutes, issue, hutch")
+    parser.add_argument("--binned", action="store_true", help="use archiver-side mean/min/max binning")
+    parser.add_argument("--render", choices=["points", "density"], default=None)
+    args = parser.parse_args()
+
+    if os.path.splitext(args.output)[1].lower() not in output_formats:
+        parser.error(f"output must end with one of {', '.join(output_formats)}")
+    comments = read_comments(args.comments) if args.comments else []
+
+    jobs = [tuple(s.strip() for s in job.split(",", 1)) for job in args.job]
+    jobs += read_jobs(args.jobs) if args.jobs else []
+    if jobs:
+        if len({job_output(args.output, *job) for job in jobs}) < len(jobs):
+            parser.error("output pattern gives the same file for several jobs; use {date} and/or {period}")
+        failed = run_batch(jobs, args.output, sync=not args.no_sync, comment_patches=comments,
+                           binned=args.binned, render=args.render, workers=args.workers)
+        sys.exit(1 if failed else 0)
+
+    programs, seconds = run(args.end, args.period, args.output, sync=not args.no_sync, comment_patches=comments,
+                            binned=args.binned, render=args.render)
+    print(f"wrote {args.output} ({programs} programs, {len(comments)} comments) in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+import numpy as np
 from datetime import datetime, timedelta
-import requests, io, pytz
-import re
-
-import ipywidgets as widgets
-from ipywidgets import VBox, HBox, Button, Text, Dropdown, IntText, Output, Select, DatePicker
+import html, io, re, time, math, threading, warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pv_cache, pv_summary, archiver_pb, decimate, schedule, ics_calendar, beam_stats
+from lazy_import import lazy_import
+
+# pandas / matplotlib / requests / pytz 는 처음 쓸 때 import (calendar sync 만 하거나 CLI 시작할 때 빠르게)
+pd = lazy_import("pandas")
+mpl = lazy_import("matplotlib")
+mfigure = lazy_import("matplotlib.figure")
+plt = lazy_import("matplotlib.pyplot")
+mdates = lazy_import("matplotlib.dates")
+mcolors = lazy_import("matplotlib.colors")
+requests = lazy_import("requests")
+pytz = lazy_import("pytz")
 
 # EPICS PVs
 epics_pvs = {
@@ -29,6 +37,9 @@ hutch_colors = {
     "Other" : "gray",
 }
 
+# 위쪽 (HXR, GMD) axis 에 그리는 hutch. 나머지는 SXR (XGMD) axis
+hxr_hutches = ["XCS", "CXI", "XPP", "MEC", "MFX"]
+
 # CXI - #EF2F2F
 # MFX - #F7C707
 # MEC - #F4F811
@@ -61,67 +72,12 @@ hutch_calendars = {
     # "MEC": "https://www.google.com/calendar/ical/nka5r8ffmrik5jcdih8nu73r1k%40group.calendar.google.com/public/basic.ics",
 
 
-def sync_hutch_from_calendar_noics( end_date_str, period_str, hutch_patches):
-    tz = pytz.timezone("America/Los_Angeles")
-    
-    try:
-        end_dt = datetime.strptime(end_date_str, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
-        end_dt = datetime.strptime(end_date_str, "%Y-%m-%d %H:%M")
-    end_dt = tz.localize(end_dt)
-    
-    if period_str.endswith('d'):
-        delta = timedelta(days=int(period_str[:-1]))
-    elif period_str.endswith('h'):
-        delta = timedelta(hours=int(period_str[:-1]))
-    else:
-        raise ValueError("period is 'Nd' or 'Nh.")
-    start_dt = end_dt - delta
-    total_added = 0
-
-    for hutch_name, url in hutch_calendars.items():
-        r = requests.get(url)
-        r.raise_for_status()
-        text = r.text
-
-        events = re.findall(r"BEGIN:VEVENT(.*?)END:VEVENT", text, flags=re.DOTALL)
-        for ev in events:
-            dtstart_match = re.search(r"DTSTART(?:;[^:]*)?:(\d{8}T\d{6}Z)", ev)
-            dtend_match   = re.search(r"DTEND(?:;[^:]*)?:(\d{8}T\d{6}Z)", ev)
-            if not dtstart_match or not dtend_match:
-                continue
-            
-            ev_start = datetime.strptime(dtstart_match.group(1), "%Y%m%dT%H%M%SZ")
-            ev_end   = datetime.strptime(dtend_match.group(1), "%Y%m%dT%H%M%SZ")
-            ev_start = pytz.utc.localize(ev_start).astimezone(tz)
-            ev_end   = pytz.utc.localize(ev_end).astimezone(tz)
-            
-            if ev_end >= start_dt and ev_start <= end_dt:
-                minutes = int((ev_end - ev_start).total_seconds() / 60)
-                hutch_patches.append((ev_start.strftime("%Y-%m-%d %H:%M"), minutes, hutch_name))
-                total_added += 1
-                
-    return total_added
+# calendar 동기화: 한 Session (connection pool 공유) 으로 모든 calendar 를 동시에 받음
+calendar_timeout = 30
+calendar_max_workers = 10
 
-def fetch_pv_data_as_df(pv: str, start: str, end: str):
-    url = f"https://pswww.slac.stanford.edu/archiveviewer/retrieval/data/getData.csv?pv={pv}&from={start}&to={end}"
-    r = requests.get(url)
-    r.raise_for_status()
-    df = pd.read_csv(io.StringIO(r.text), header=None,
-                     names=["Timestamp", "Value1", "Value2", "Value3", "Value4"])
-
-    df = df[pd.to_numeric(df["Timestamp"], errors='coerce').notnull()]
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"].astype(float), unit='s', utc=True)
-    df["Timestamp"] = df["Timestamp"].dt.tz_convert("America/Los_Angeles")
-    
-    # Value 변환 + 시간 정렬
-    df["Value1"] = pd.to_numeric(df["Value1"], errors='coerce')
-    df = df.sort_values("Timestamp").reset_index(drop=True)
-    
-    return df
-
-# --- Report plot ---
-def report_range(end_date: str, period: str, hutch_patches=[], comment_patches=[]):
+def report_window(end_date: str, period: str):
+    # "YYYY-MM-DD HH:MM[:SS]" (LA 시간), "Nd"/"Nh" -> (start_dt, end_dt) tz-aware
     tz = pytz.timezone("America/Los_Angeles")
     try:
         end_dt = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
@@ -135,39 +91,383 @@ def report_range(end_date: str, period: str, hutch_patches=[], comment_patches=[
         delta = timedelta(hours=int(period[:-1]))
     else:
         raise ValueError("period is 'Nd' or 'Nh.")
-    start_dt = end_dt - delta
+    return end_dt - delta, end_dt
+
+def sync_hutch_from_calendar_noics( end_date_str, period_str, hutch_patches, calendars=None, timeout=None,
+                                    session=None, progress=None, details=False):
+    # returns 추가된 수. details=True 면 (추가된 수, {hutch: seconds}, {hutch: error message})
+    # hutch_patches: schedule.Schedule (튜플 리스트면 새 항목을 리스트 끝에 붙임)
+    # session: 같이 쓸 requests.Session (없으면 새로 만듦), progress(hutch, status): calendar 별 진행 상황
+    # 이미 있는 program (hutch, start, 길이) 는 다시 추가하지 않음
+    start_dt, end_dt = report_window(end_date_str, period_str)
+
+    calendars = hutch_calendars if calendars is None else calendars
+    timeout = timeout or calendar_timeout
+    results, timings, failures = {}, {}, {}
+
+    def timed_fetch(hutch_name, session):
+        t0 = time.perf_counter()
+        if progress:
+            progress(hutch_name, "running")
+        try:
+            return fetch_calendar_patches(hutch_name, calendars[hutch_name], start_dt, end_dt, session, timeout)
+        finally:
+            timings[hutch_name] = time.perf_counter() - t0
+
+    workers = max(1, min(calendar_max_workers, len(calendars)))
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+        session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(timed_fetch, name, session): name for name in calendars}
+            for fut in as_completed(futures):
+                name = futures[fut]
+                try:
+                    results[name] = fut.result()
+                    status = f"{len(results[name])} events, {timings[name]:.1f}s"
+                except Exception as e:
+                    failures[name] = status = f"{type(e).__name__}: {e}"
+                if progress:
+                    progress(name, status)
+    finally:
+        if own_session:
+            session.close()
+
+    # calendar 순서대로, 새 event 만 추가
+    programs = schedule.as_schedule(hutch_patches, with_issue=False)
+    total_added = 0
+    for hutch_name in calendars:
+        new = results.get(hutch_name, [])
+        if programs is not hutch_patches:
+            new = [patch for patch in new if patch not in programs]
+            hutch_patches.extend(new)
+        total_added += programs.extend(new)
+
+    if details:
+        return total_added, timings, failures
+    # details 없이 부른 쪽은 failures 를 못 받으므로 실패한 calendar 는 warning 으로 알림
+    for hutch_name, error in failures.items():
+        warnings.warn(f"calendar sync failed for {hutch_name}: {error}", RuntimeWarning, stacklevel=2)
+    return total_added
 
-    start_time = start_dt.astimezone(pytz.UTC).strftime("%Y-%m-%dT%H:%M:%S.000Z")
-    end_time   = end_dt.astimezone(pytz.UTC).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+def fetch_calendar_patches(hutch_name, url, start_dt, end_dt, session=None, timeout=None):
+    # feed 는 ics_calendar 캐시를 거침 (ETag/Last-Modified 조건부 GET, 304 면 파싱 생략)
+    tz = pytz.timezone("America/Los_Angeles")
+    # event 는 SQLite store 에서 창과 겹치는 것만 조회
+    events, _ = ics_calendar.get_events(url, start_dt.timestamp(), end_dt.timestamp(),
+                                        session=session, timeout=timeout or calendar_timeout)
+    patches = []
+    for uid, ev_start, ev_end in events:
+        minutes = int((ev_end - ev_start) / 60)
+        start_str = datetime.fromtimestamp(ev_start, tz).strftime("%Y-%m-%d %H:%M")
+        patches.append((start_str, minutes, hutch_name))
+    return patches
+
+archiver_time_fmt = "%Y-%m-%dT%H:%M:%S.000Z"
+
+# 동시에 archiver 에 요청할 PV 수
+fetch_max_workers = 4
+# 긴 기간은 chunk 단위로 나눠서 병렬 요청
+fetch_chunk = timedelta(days=1)
+fetch_chunk_workers = 4
+fetch_retries = 3
+# PV / chunk / binning operator pool 이 겹쳐도 한 process 에서 archiver 에 동시에 여는 연결은 이 수까지
+fetch_max_connections = 8
+_fetch_slots = threading.BoundedSemaphore(fetch_max_connections)
+# 받은 샘플은 pv_cache 에 저장하고, 다음 요청에서는 빠진 구간만 archiver 에서 받음
+fetch_use_cache = True
+# "csv": getData.csv, "pb": getData.raw (PB/HTTP, archiver_pb 로 바로 numpy 배열로 디코딩)
+fetch_backend = "csv"
+
+# archiver post-processing (서버에서 binning): mean_N(pv), min_N(pv), ...
+# 첫 operator 가 Value1, 나머지는 Min / Max 처럼 column 으로 붙음
+bin_operators = ("mean", "min", "max")
+
+def fetch_pv_data_as_df(pv: str, start: str, end: str, chunk=None, max_workers=None, retries=None, use_cache=None,
+                        backend=None, bin_seconds=None, operators=None, session=None):
+    # session: archiver 요청에 쓸 requests.Session (GUI 의 Cancel 은 이 session 의 응답을 닫음)
+    if bin_seconds:
+        return _fetch_pv_binned(pv, start, end, int(bin_seconds), operators or bin_operators,
+                                retries=retries, use_cache=use_cache, backend=backend, session=session)
+    if use_cache is None:
+        use_cache = fetch_use_cache
+    if not use_cache:
+        return _fetch_pv_range(pv, start, end, chunk, max_workers, retries, backend, session)
+
+    t0 = datetime.strptime(start, archiver_time_fmt).replace(tzinfo=pytz.UTC).timestamp()
+    t1 = datetime.strptime(end, archiver_time_fmt).replace(tzinfo=pytz.UTC).timestamp()
+    bin_seconds = _operator_bin_seconds(pv)
+    for gap_start, gap_end in pv_cache.missing_ranges(pv, t0, t1):
+        gap_start, gap_end = math.floor(gap_start), math.ceil(gap_end)
+        if bin_seconds:
+            # 창 끝에서 잘린 bin 이 옆 창의 온전한 bin 을 덮어쓰지 않게 bin 경계로 맞춤
+            gap_start = gap_start // bin_seconds * bin_seconds
+            gap_end = -(-gap_end // bin_seconds) * bin_seconds
+        df = _fetch_pv_range(pv,
+                             datetime.fromtimestamp(gap_start, pytz.UTC).strftime(archiver_time_fmt),
+                             datetime.fromtimestamp(gap_end, pytz.UTC).strftime(archiver_time_fmt),
+                             chunk, max_workers, retries, backend, session)
+        if bin_seconds:
+            # 창 밖 (from 직전) bin 은 저장하지 않음
+            ts = beam_stats.epoch_seconds(df["Timestamp"])
+            df = df[(ts >= gap_start) & (ts < gap_end)]
+        # 마지막 bin 은 아직 다 안 찼을 수 있음
+        pv_cache.store(pv, gap_start, gap_end, df, settle=pv_cache.pv_cache_settle + bin_seconds)
+    return pv_cache.load(pv, t0, t1)
+
+def _operator_bin_seconds(pv: str):
+    m = re.match(r"^\w+_(\d+)\(", pv)
+    return int(m.group(1)) if m else 0
+
+def _fetch_pv_binned(pv: str, start: str, end: str, bin_seconds: int, operators, **kwargs):
+    with ThreadPoolExecutor(max_workers=len(operators)) as pool:
+        parts = list(pool.map(
+            lambda op: fetch_pv_data_as_df(f"{op}_{bin_seconds}({pv})", start, end, **kwargs), operators))
+
+    df = parts[0][["Timestamp", "Value1"]]
+    for op, part in zip(operators[1:], parts[1:]):
+        part = part[["Timestamp", "Value1"]].rename(columns={"Value1": op[0].upper() + op[1:]})
+        df = df.merge(part, on="Timestamp", how="outer")
+    return df.sort_values("Timestamp").reset_index(drop=True)
+
+def resolution_for_plot(period_seconds: float, width_px: int):
+    # plot 의 pixel 하나에 bin 하나 정도
+    return max(1, math.ceil(period_seconds / max(1, width_px)))
+
+def _fetch_pv_range(pv: str, start: str, end: str, chunk=None, max_workers=None, retries=None, backend=None,
+                    session=None):
+    # chunk: timedelta -> [start, end] 를 chunk 크기로 나눠서 병렬로 받고 시간순으로 합침
+    if chunk is None:
+        return _fetch_pv_window(pv, start, end, retries or 1, backend, session)
+
+    windows = split_time_window(start, end, chunk)
+    if len(windows) <= 1:
+        return _fetch_pv_window(pv, start, end, retries or fetch_retries, backend, session)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers or fetch_chunk_workers, len(windows)))) as pool:
+        parts = list(pool.map(lambda w: _fetch_pv_window(pv, w[0], w[1], retries or fetch_retries, backend, session),
+                              windows))
+
+    df = pd.concat(parts, ignore_index=True)
+    # archiver 는 from 직전 샘플도 같이 주므로 chunk 경계에서 중복이 생김
+    df = df.sort_values("Timestamp", kind="stable")
+    df = df.drop_duplicates(subset="Timestamp", keep="first").reset_index(drop=True)
+    return df
+
+def split_time_window(start: str, end: str, chunk):
+    start_dt = datetime.strptime(start, archiver_time_fmt)
+    end_dt = datetime.strptime(end, archiver_time_fmt)
+    windows = []
+    t = start_dt
+    while t < end_dt:
+        t_next = min(t + chunk, end_dt)
+        windows.append((t.strftime(archiver_time_fmt), t_next.strftime(archiver_time_fmt)))
+        t = t_next
+    return windows
+
+def _fetch_pv_window(pv: str, start: str, end: str, retries=1, backend=None, session=None):
+    fetch = _fetch_pv_pb if (backend or fetch_backend) == "pb" else _fetch_pv_csv
+    for attempt in range(retries):
+        try:
+            with _fetch_slots:
+                return fetch(pv, start, end, session)
+        except requests.RequestException:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+# getData.csv 는 stream 으로 block 단위 파싱 (Timestamp, Value1 만 numpy 배열로 유지)
+fetch_stream_block = 1 << 20
+fetch_value_dtype = np.float64
+
+def _fetch_pv_csv(pv: str, start: str, end: str, session=None):
+    url = f"https://pswww.slac.stanford.edu/archiveviewer/retrieval/data/getData.csv?pv={pv}&from={start}&to={end}"
+    ts_parts, val_parts = [], []
+    tail = b""
+    with (session or requests).get(url, stream=True) as r:
+        r.raise_for_status()
+        for block in r.iter_content(chunk_size=fetch_stream_block):
+            block = tail + block
+            cut = block.rfind(b"\n") + 1
+            tail = block[cut:]
+            _parse_csv_block(block[:cut], ts_parts, val_parts)
+    _parse_csv_block(tail, ts_parts, val_parts)
+
+    ts = np.concatenate(ts_parts) if ts_parts else np.empty(0)
+    values = np.concatenate(val_parts) if val_parts else np.empty(0, dtype=fetch_value_dtype)
+    return _arrays_to_df(ts, values)
+
+def _parse_csv_block(block: bytes, ts_parts, val_parts):
+    if not block.strip():
+        return
+    df = pd.read_csv(io.BytesIO(block), header=None,
+                     names=["Timestamp", "Value1", "Value2", "Value3", "Value4"],
+                     usecols=["Timestamp", "Value1"])
+    ts = pd.to_numeric(df["Timestamp"], errors='coerce').to_numpy(dtype=np.float64)
+    values = pd.to_numeric(df["Value1"], errors='coerce').to_numpy(dtype=fetch_value_dtype)
+    keep = ~np.isnan(ts)
+    ts_parts.append(ts[keep])
+    val_parts.append(values[keep])
+
+def _fetch_pv_pb(pv: str, start: str, end: str, session=None):
+    ts, values, _ = archiver_pb.fetch_pv_arrays(pv, start, end, session)
+    return _arrays_to_df(ts, values.astype(fetch_value_dtype, copy=False))
+
+def _arrays_to_df(ts, values):
+    # epoch seconds -> LA 시간, 시간 정렬
+    if len(ts) > 1 and not np.all(ts[1:] >= ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        ts, values = ts[order], values[order]
+    return pd.DataFrame({
+        "Timestamp": pd.to_datetime(ts, unit='s', utc=True).tz_convert("America/Los_Angeles"),
+        "Value1": values,
+    })
+
+def fetch_all_pvs(start: str, end: str, pvs=None, max_workers=None, chunk=None, backend=None, bin_seconds=None,
+                  session=None, progress=None):
+    # pvs: {name: (pv, color)} (default: epics_pvs), progress(name, status): PV 별 진행 상황
+    # returns ({name: df}, {name: seconds})
+    pvs = epics_pvs if pvs is None else pvs
+    max_workers = max_workers or fetch_max_workers
+
+    def timed_fetch(name):
+        t0 = time.perf_counter()
+        if progress:
+            progress(name, "running")
+        df = fetch_pv_data_as_df(pvs[name][0], start, end, chunk=chunk, backend=backend, bin_seconds=bin_seconds,
+                                 session=session)
+        seconds = time.perf_counter() - t0
+        if progress:
+            progress(name, f"{len(df)} samples, {seconds:.1f}s")
+        return df, seconds
+
+    dfs, timings = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pvs) or 1))) as pool:
+        futures = {pool.submit(timed_fetch, name): name for name in pvs}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            dfs[name], timings[name] = fut.result()
+    return dfs, timings
+
+# --- Report plot ---
+def plot_pv(ax, df, color, label, connect=False):
+    if "Min" in df and "Max" in df:
+        # binning 된 데이터: min/max envelope 를 같이 그려야 짧은 beam trip 도 보임
+        ax.fill_between(df["Timestamp"], df["Min"], df["Max"], step="mid", color=color, alpha=0.3, lw=0)
+        ax.plot(df["Timestamp"], df["Value1"], '-', lw=0.8, color=color, label=label)
+    elif connect:
+        # minmax/lttb 로 줄인 점은 선으로 이으면 pixel 마다 min~max 세로선이 됨
+        # (decimate_df 가 NaN 구간과 긴 gap 에 NaN 을 남겨 두므로 선이 거기서 끊김)
+        ax.plot(df["Timestamp"], df["Value1"], '-', lw=0.5, color=color, label=label)
+    else:
+        ax.plot(df["Timestamp"], df["Value1"], 'o', alpha=0.1, ms=1, color=color, label=label)
+
+def plot_pv_density(ax, df, color, label, xlim, ylim, nx, ny=200):
+    # (time, energy) 2D histogram 을 한 장의 이미지로 -> 점 수와 상관없이 artist 하나, PDF 도 작음
+    x0, x1 = mdates.date2num(xlim[0]), mdates.date2num(xlim[1])
+    # date2num 에 Series 를 넘기면 원소마다 변환하므로 느림 -> epoch seconds 로 (draw_spans 와 같은 방식)
+    x = mdates.date2num(datetime.fromtimestamp(0, pytz.UTC)) + beam_stats.epoch_seconds(df["Timestamp"]) / 86400
+    y = df["Value1"].to_numpy(dtype=np.float64)
+    keep = ~np.isnan(y)
+    counts, _, _ = np.histogram2d(x[keep], y[keep], bins=[nx, ny], range=[[x0, x1], list(ylim)])
+
+    rgb = mcolors.to_rgb(color)
+    cmap = mcolors.LinearSegmentedColormap.from_list(label, [(*rgb, 0.25), (*rgb, 1.0)])
+    cmap.set_bad(alpha=0)
+    image = np.ma.masked_equal(np.log1p(counts.T), 0)
+    ax.xaxis_date(xlim[0].tzinfo)
+    ax.imshow(image, origin="lower", extent=[x0, x1, ylim[0], ylim[1]], aspect="auto",
+              interpolation="nearest", cmap=cmap, label=label)
+
+def draw_spans(ax, starts, ends, ymin, ymax, colors, alpha, labels, label_y, fontsize=8):
+    # span 들을 PolyCollection 하나로 그리고, 글자가 들어갈 만큼 넓은 span 에만 label 을 붙임
+    # (ax 의 xlim 이 정해진 뒤에 호출)
+    if len(starts) == 0:
+        return
+    x0 = mdates.date2num(datetime.fromtimestamp(0, pytz.UTC)) + starts / 86400
+    width = (ends - starts) / 86400
+    ax.broken_barh(list(zip(x0, width)), (ymin, ymax - ymin), facecolors=colors, edgecolors=colors, alpha=alpha)
+
+    xlim = ax.get_xlim()
+    px_per_day = ax.bbox.width / (xlim[1] - xlim[0])
+    char_px = 0.6 * fontsize * ax.figure.dpi / 72
+    for x, w, text in zip(x0, width, labels):
+        if w * px_per_day >= len(text) * char_px:
+            ax.text(x + w / 2, label_y, text, ha='center', va='center', fontsize=fontsize)
+
+# plot 전에 점 수를 figure 폭에 맞게 줄이는 방법: "minmax", "lttb", "stride"
+report_decimation = "minmax"
+# "points": 점/선, "density": 2D histogram 이미지
+report_render = "points"
+
+report_figsize = (15, 12)
+
+def report_fetch_args(end_date: str, period: str, binned=False):
+    # report_range 가 archiver 에 요청하는 (start, end, fetch_all_pvs 인자). batch 에서 cache 를 미리 채울 때도 씀
+    start_dt, end_dt = report_window(end_date, period)
+    delta = end_dt - start_dt
+    start_time = start_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt)
+    end_time   = end_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt)
+    if binned:
+        width_px = decimate.point_budget(report_figsize, mpl.rcParams["figure.dpi"])
+        return start_time, end_time, {"bin_seconds": resolution_for_plot(delta.total_seconds(), width_px)}
+    return start_time, end_time, {"chunk": fetch_chunk if delta > fetch_chunk else None}
+
+def report_range(end_date: str, period: str, hutch_patches=[], comment_patches=[], binned=False, decimation=None,
+                 render=None, output=None, session=None, progress=None):
+    # binned=True: archiver 에서 plot 폭에 맞춰 mean/min/max 로 binning 된 데이터를 받아서 envelope 로 그림
+    # output: 파일 경로 (.png/.pdf/.svg) 나 file object 를 주면 화면에 띄우지 않고 저장
+    # session, progress: fetch_all_pvs 로 넘김 (GUI 의 background 실행용)
+    tz = pytz.timezone("America/Los_Angeles")
+    start_dt, end_dt = report_window(end_date, period)
 
     # gmd_df = fetch_pv_data_as_df(epics_pvs["GMD"][0], start_time, end_time).iloc[::10]
     # xgmd_df = fetch_pv_data_as_df(epics_pvs["XGMD"][0], start_time, end_time).iloc[::10]
-    gmd_df = fetch_pv_data_as_df(epics_pvs["GMD"][0], start_time, end_time)
-    xgmd_df = fetch_pv_data_as_df(epics_pvs["XGMD"][0], start_time, end_time)
+    figsize = report_figsize
+    width_px = decimate.point_budget(figsize, mpl.rcParams["figure.dpi"])
+    start_time, end_time, fetch_args = report_fetch_args(end_date, period, binned)
+    pv_dfs, fetch_timings = fetch_all_pvs(start_time, end_time, session=session, progress=progress, **fetch_args)
+    gmd_df, xgmd_df = pv_dfs["GMD"], pv_dfs["XGMD"]
+    if progress is None:
+        print("fetch: " + ", ".join(f"{name} {sec:.1f}s" for name, sec in fetch_timings.items()))
+    else:
+        progress("plot", "running")
     
-    if len(gmd_df) > 0:
-        gmd_df = gmd_df.iloc[::10]
-    if len(xgmd_df) > 0:
-        xgmd_df = xgmd_df.iloc[::10]
-
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15,12), sharex=False)
+    decimation = decimation or report_decimation
+    render = render or report_render
+    gmd_ylim, xgmd_ylim = (-0.4, 3), (-0.4, 1.5)
+    if not binned and render != "density":
+        # availability 에서 "데이터 없음" 으로 보는 간격은 선으로도 잇지 않음
+        max_gap = beam_stats.availability_max_gap
+        gmd_df = decimate.decimate_df(gmd_df, width_px, decimation, max_gap=max_gap)
+        xgmd_df = decimate.decimate_df(xgmd_df, width_px, decimation, max_gap=max_gap)
+    connect = decimation in ("minmax", "lttb")
+
+    # 파일로 저장할 때는 pyplot 을 거치지 않음 (background thread / batch process 에서도 안전)
+    fig = mfigure.Figure(figsize=figsize) if output else plt.figure(figsize=figsize)
+    ax1, ax2 = fig.subplots(2, 1, sharex=False)
+
+    if render == "density":
+        plot_pv_density(ax1, gmd_df, epics_pvs["GMD"][1], "GMD", (start_dt, end_dt), gmd_ylim, width_px)
+        plot_pv_density(ax2, xgmd_df, epics_pvs["XGMD"][1], "XGMD", (start_dt, end_dt), xgmd_ylim, width_px)
+    else:
+        plot_pv(ax1, gmd_df, epics_pvs["GMD"][1], "GMD", connect)
+        plot_pv(ax2, xgmd_df, epics_pvs["XGMD"][1], "XGMD", connect)
 
     # GMD
-    ax1.plot(gmd_df["Timestamp"], gmd_df["Value1"], 'o', alpha=0.1, ms=1,
-             color=epics_pvs["GMD"][1], label="GMD")
     ax1.set_ylabel("HXR Pulse Energy(mJ)")
     ax1.set_title(f"Report {start_dt.strftime('%Y-%m-%d')} to {end_dt.strftime('%Y-%m-%d')}")
     ax1.grid(True)
-    ax1.set_ylim([-0.4, 3])
+    ax1.set_ylim(gmd_ylim)
     ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d\n%H:%M', tz=tz))
     
     # XGMD
-    ax2.plot(xgmd_df["Timestamp"], xgmd_df["Value1"], 'o', alpha=0.1, ms=1,
-             color=epics_pvs["XGMD"][1], label="XGMD")
     ax2.set_xlabel("Time")
     ax2.set_ylabel("SXR Pulse Energy(mJ)")
     ax2.grid(True)
-    ax2.set_ylim([-0.4, 1.5])
+    ax2.set_ylim(xgmd_ylim)
     ax2.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d\n%H:%M', tz=tz))
     margin = (end_dt - start_dt) * 0.05 
     ax1.set_xlim(start_dt-margin, end_dt+margin)
@@ -178,36 +478,28 @@ def report_range(end_date: str, period: str, hutch_patches=[], comment_patches=[
     comment_patch_ymin, comment_patch_ymax = 0, 3
     table_data = []
 
+    # 튜플 리스트는 Schedule 로 한 번만 변환 (start 순 정렬, 같은 program 은 하나만), 창과 겹치는 것만 그림
+    t0, t1 = start_dt.timestamp(), end_dt.timestamp()
+    programs = schedule.as_schedule(hutch_patches, tz, with_issue=False)
+    comments = schedule.as_schedule(comment_patches, tz, with_issue=True)
+
+    in_window = programs.query(t0, t1)
+    on_hxr = np.isin(programs.code[in_window], programs.codes(hxr_hutches))
+    for ax, idx in [(ax1, in_window[on_hxr]), (ax2, in_window[~on_hxr])]:
+        hutches = [programs.label(i) for i in idx]
+        draw_spans(ax, programs.start[idx], programs.end[idx], patch_ymin, patch_ymax,
+                   [hutch_colors.get(h, 'gray') for h in hutches], 0.8,
+                   hutches, patch_ymin + 0.4*(patch_ymax - patch_ymin))
+
+    # comment 번호는 전체 comment 의 시간순 번호
+    idx = comments.query(t0, t1)
     for ax in [ax1, ax2]:
-        for start_str, minutes, hutch in hutch_patches:
-            start_patch = tz.localize(datetime.strptime(start_str, "%Y-%m-%d %H:%M"))
-            end_patch = start_patch + timedelta(minutes=minutes)
-            if start_dt <= end_patch and end_dt >= start_patch:
-                color = hutch_colors.get(hutch, 'gray')
-                if hutch in ["XCS", "CXI", "XPP", "MEC", "MFX"]:
-                    target_ax = ax1
-                else:
-                    target_ax = ax2
-                if ax is target_ax:
-                    target_ax.fill_betweenx([patch_ymin, patch_ymax], start_patch, end_patch, color=color, alpha=0.8)
-                    target_ax.text(start_patch + (end_patch - start_patch)/2,
-                                   patch_ymin + 0.4*(patch_ymax - patch_ymin),
-                                   hutch, ha='center', va='center', fontsize=8)
-
-        sorted_comments = sorted(comment_patches,
-            key=lambda x: tz.localize(datetime.strptime(x[0], "%Y-%m-%d %H:%M")))
-        for i, (start_str, minutes, issue, hutch) in enumerate(sorted_comments, start=1):
-            start_comment = tz.localize(datetime.strptime(start_str, "%Y-%m-%d %H:%M"))
-            end_comment = start_comment + timedelta(minutes=minutes)
-            if start_dt <= end_comment and end_dt >= start_comment:
-                ax.fill_betweenx([comment_patch_ymin, comment_patch_ymax],
-                                 start_comment, end_comment,
-                                 color='gray', alpha=0.2)
-                ax.text(start_comment + (end_comment - start_comment)/2,
-                        comment_patch_ymin + 0.7*(comment_patch_ymax - comment_patch_ymin),
-                        str(i), ha='center', va='center', fontsize=8)
-                if ax is ax2: 
-                    table_data.append([i, start_str, minutes, issue, hutch])
+        draw_spans(ax, comments.start[idx], comments.end[idx], comment_patch_ymin, comment_patch_ymax,
+                   'gray', 0.2, [str(i + 1) for i in idx],
+                   comment_patch_ymin + 0.7*(comment_patch_ymax - comment_patch_ymin))
+    for i in idx:
+        start_str, minutes, issue, hutch = comments[i]
+        table_data.append([i + 1, start_str, minutes, issue, hutch])
 
     if table_data:
         table = ax2.table(cellText=table_data,
@@ -217,11 +509,190 @@ def report_range(end_date: str, period: str, hutch_patches=[], comment_patches=[
         table.auto_set_font_size(False)
         table.set_fontsize(8)
 
-    plt.subplots_adjust(hspace=0.3, bottom=0.5)  
-    plt.show()
+    fig.subplots_adjust(hspace=0.3, bottom=0.5)
+    if output:
+        fig.savefig(output, bbox_inches="tight")
+    else:
+        plt.show()
+
+# --- beam availability ---
+def hutch_pv(hutch: str):
+    # report 의 axis 와 같은 기준: HXR hutch 는 GMD, 나머지는 XGMD
+    return "GMD" if hutch in hxr_hutches else "XGMD"
+
+def program_conflicts(hutch_patches, hutches=None):
+    # 같은 시간에 잡힌 서로 다른 hutch 의 program (기본: HXR hutch 끼리, 한 line 의 beam 은 한 곳만 받음)
+    # returns [(start_str, minutes, hutch, other hutch)], 겹친 구간 start 순
+    programs = schedule.as_schedule(hutch_patches, pytz.timezone("America/Los_Angeles"), with_issue=False)
+    i, j, t0, t1 = programs.conflicts(hxr_hutches if hutches is None else hutches)
+    order = np.argsort(t0, kind="stable")
+    return [(datetime.fromtimestamp(int(t0[k]), programs.tz).strftime(schedule.patch_time_fmt),
+             int(t1[k] - t0[k]) // 60, programs.label(i[k]), programs.label(j[k])) for k in order]
+
+def beam_availability(end_date: str, period: str, hutch_patches=[], thresholds=None, max_gap=None):
+    # full-rate 데이터로 threshold 이상인 시간을 적분 (beam_stats)
+    # returns (hutch 별 DataFrame, PV 별 창 전체 DataFrame)
+    start_dt, end_dt = report_window(end_date, period)
+    t0, t1 = start_dt.timestamp(), end_dt.timestamp()
+    start_time = start_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt)
+    end_time = end_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt)
+    chunk = fetch_chunk if end_dt - start_dt > fetch_chunk else None
+    pv_dfs, _ = fetch_all_pvs(start_time, end_time, chunk=chunk)
+    series = {name: (beam_stats.epoch_seconds(df["Timestamp"]), df["Value1"].to_numpy(dtype=np.float64))
+              for name, df in pv_dfs.items()}
+
+    tz = pytz.timezone("America/Los_Angeles")
+    programs = schedule.as_schedule(hutch_patches, tz, with_issue=False)
+    per_hutch = beam_stats.hutch_availability(programs, series, hutch_pv, t0, t1, thresholds, max_gap)
+    return per_hutch, beam_stats.window_totals(series, t0, t1, thresholds, max_gap)
+
+# --- downtime 자동 검출 -> comment_patches 후보 ---
+def detect_downtime(end_date: str, period: str, hutch_patches=[], thresholds=None, min_minutes=None, max_gap=None,
+                    pv_dfs=None):
+    # returns [(start_str, minutes, issue, hutch)], start 순. hutch 는 그 시간에 같은 line 에서 가장 많이 겹친 program
+    # pv_dfs: 이미 받은 {name: df} 가 있으면 다시 받지 않음
+    tz = pytz.timezone("America/Los_Angeles")
+    start_dt, end_dt = report_window(end_date, period)
+    if pv_dfs is None:
+        start_time = start_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt)
+        end_time = end_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt)
+        chunk = fetch_chunk if end_dt - start_dt > fetch_chunk else None
+        pv_dfs, _ = fetch_all_pvs(start_time, end_time, chunk=chunk)
+    thresholds = {**beam_stats.downtime_thresholds, **(thresholds or {})}
+    min_duration = (beam_stats.downtime_min_minutes if min_minutes is None else min_minutes) * 60
+    programs = schedule.as_schedule(hutch_patches, tz, with_issue=False)
+    label_pv = np.array([hutch_pv(h) for h in programs.labels], dtype=object)
+
+    found = []
+    for name, df in pv_dfs.items():
+        if name not in thresholds:
+            continue
+        low, high = thresholds[name]
+        starts, ends = beam_stats.downtime_runs(beam_stats.epoch_seconds(df["Timestamp"]),
+                                                df["Value1"].to_numpy(dtype=np.float64), low, high,
+                                                min_duration, max_gap)
+        for t0, t1 in zip(starts, ends):
+            # run 과 겹치는 program 중 같은 line 것 (interval index)
+            idx = programs.query(t0, t1)
+            idx = idx[label_pv[programs.code[idx]] == name]
+            overlap = np.minimum(t1, programs.end[idx]) - np.maximum(t0, programs.start[idx])
+            hutch = programs.label(idx[overlap.argmax()]) if len(idx) and overlap.max() > 0 else "Other"
+            found.append((t0, (datetime.fromtimestamp(t0, tz).strftime(schedule.patch_time_fmt),
+                               max(1, int(round((t1 - t0) / 60))), f"{name} < {low:g} mJ (auto)", hutch)))
+    return [patch for _, patch in sorted(found, key=lambda f: f[0])]
+
+# --- 긴 기간 (분기 / 1 년): pv_summary 의 시간/일 요약으로 ---
+# 요약 만들 때 받은 raw 샘플은 pv_cache 에 넣지 않음 (1 년치 raw 를 cache 에 쌓지 않게)
+summary_use_pv_cache = False
+summary_fetch_span = timedelta(days=7)
+
+def _summary_windows(span_start, span_end):
+    # [span_start, span_end] 를 summary_fetch_span 이하의 창으로 나눔. 경계는 LA 자정 (하루 bin 경계) 에서만 자르므로
+    # DST 가 바뀌어도 bin 이 두 창에 걸치지 않음 (hour bin 은 하루 bin 안에 들어감)
+    _, day_ends = pv_summary.bin_edges(span_start, span_end, "day")
+    cuts = [t for t in day_ends.tolist() if span_start < t < span_end] + [span_end]
+    max_span = summary_fetch_span.total_seconds()
+    windows, w0, prev = [], span_start, span_start
+    for t in cuts:
+        if t - w0 > max_span and prev > w0:
+            windows.append((w0, prev))
+            w0 = prev
+        prev = t
+    windows.append((w0, span_end))
+    return windows
+
+def update_summaries(start_dt, end_dt, pvs=None, resolutions=None, progress=None, session=None):
+    # 저장 안 된 bin 만 archiver 에서 받아 요약. returns {name: 새로 계산한 bin 수}
+    pvs = epics_pvs if pvs is None else pvs
+    resolutions = resolutions or list(pv_summary.summary_resolutions)
+    t0, t1 = start_dt.timestamp(), end_dt.timestamp()
+    computed = {}
+    for name, (pv, _) in pvs.items():
+        threshold = beam_stats.availability_thresholds[name]
+        missing = {res: pv_summary.missing_bins(pv, t0, t1, res, threshold) for res in resolutions}
+        # 빠진 bin 들을 합쳐서 summary_fetch_span 이하 구간으로 받음
+        spans = pv_cache._merge_intervals([(s, e) for starts, ends in missing.values()
+                                           for s, e in zip(starts.tolist(), ends.tolist())])
+        computed[name] = 0
+        for k, (span_start, span_end) in enumerate(spans):
+            for a, b in _summary_windows(span_start, span_end):
+                w0 = datetime.fromtimestamp(a, pytz.UTC).strftime(archiver_time_fmt)
+                w1 = datetime.fromtimestamp(b, pytz.UTC).strftime(archiver_time_fmt)
+                if progress:
+                    progress(name, f"fetching {w0[:10]} ({k + 1}/{len(spans)} spans)")
+                df = fetch_pv_data_as_df(pv, w0, w1, chunk=fetch_chunk, use_cache=summary_use_pv_cache,
+                                         session=session)
+                t = beam_stats.epoch_seconds(df["Timestamp"])
+                v = df["Value1"].to_numpy(dtype=np.float64)
+                for res, (starts, ends) in missing.items():
+                    inside = (starts >= a) & (ends <= b)
+                    if inside.any():
+                        summary = pv_summary.summarize(t, v, starts[inside], ends[inside], threshold)
+                        pv_summary.store(pv, res, threshold, starts[inside], ends[inside], summary)
+                        computed[name] += int(inside.sum())
+        if progress:
+            progress(name, f"{computed[name]} new bins")
+    return computed
+
+def summary_range(end_date: str, period: str, resolution="day", freq=None, update=True, pvs=None):
+    # returns {name: DataFrame} (pv_summary.load, freq 를 주면 rollup)
+    pvs = epics_pvs if pvs is None else pvs
+    start_dt, end_dt = report_window(end_date, period)
+    if update:
+        update_summaries(start_dt, end_dt, pvs)
+    dfs = {}
+    for name, (pv, _) in pvs.items():
+        df = pv_summary.load(pv, resolution, beam_stats.availability_thresholds[name],
+                             start_dt.timestamp(), end_dt.timestamp())
+        dfs[name] = pv_summary.rollup(df, freq) if freq else df
+    return dfs
+
+def report_rollup(end_date: str, period: str, freq="W", resolution="day", update=True, output=None):
+    # 분기 / 1 년 view: rollup 단위 (freq) 마다 pulse energy 분포 (p05-p95, mean) 와 availability %
+    start_dt, end_dt = report_window(end_date, period)
+    t_start = time.perf_counter()
+    dfs = summary_range(end_date, period, resolution, freq, update)
+    tz = pytz.timezone("America/Los_Angeles")
+
+    figsize = (15, 8)
+    fig = mfigure.Figure(figsize=figsize) if output else plt.figure(figsize=figsize)
+    axes = fig.subplots(len(dfs), 1, sharex=True, squeeze=False)[:, 0]
+    for ax, (name, df) in zip(axes, dfs.items()):
+        color = epics_pvs[name][1]
+        # step 은 마지막 bin 의 끝까지 그리도록 End 를 한 점 더 붙임
+        x = pd.concat([df["Timestamp"], df["End"].iloc[-1:]], ignore_index=True)
+        hold = lambda col: np.r_[col.to_numpy(dtype=np.float64), col.to_numpy(dtype=np.float64)[-1:]]
+        ax.fill_between(x, hold(df["p05"]), hold(df["p95"]), step="post", color=color, alpha=0.25, lw=0,
+                        label=f"{name} p05-p95")
+        ax.step(x, hold(df["mean"]), where="post", color=color, lw=1, label=f"{name} mean")
+        ax.set_ylabel(f"{name} Pulse Energy(mJ)")
+        ax.grid(True)
+        availability = 100 * df["above"] / df["covered"].where(df["covered"] > 0)
+        ax_pct = ax.twinx()
+        ax_pct.step(x, hold(availability), where="post", color="black", lw=1, ls="--",
+                    label=f"> {beam_stats.availability_thresholds[name]:g} mJ (%)")
+        ax_pct.set_ylim(0, 105)
+        ax_pct.set_ylabel("Beam above threshold (%)")
+        lines = ax.get_legend_handles_labels()
+        pct_lines = ax_pct.get_legend_handles_labels()
+        ax.legend(lines[0] + pct_lines[0], lines[1] + pct_lines[1], loc="lower left", fontsize=8)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d', tz=tz))
+    axes[0].set_title(f"Rollup ({freq}) {start_dt.strftime('%Y-%m-%d')} to {end_dt.strftime('%Y-%m-%d')}")
+    axes[0].set_xlim(start_dt, end_dt)
+    print(f"rollup: {time.perf_counter() - t_start:.2f}s")
+    if output:
+        fig.savefig(output, bbox_inches="tight")
+    else:
+        plt.show()
 
 # --- GUI ---
 def report_gui():
+    # ipywidgets 는 GUI 에서만 필요 (report_cli 등 headless 실행에서는 import 안 함)
+    import ipywidgets as widgets
+    from ipywidgets import VBox, HBox, Button, Text, Dropdown, IntText, Output, Select, DatePicker, IntProgress, HTML
+    from IPython.display import Image
+    import gui_tasks
+
     # --- report End date/time ---
     end_date_picker = DatePicker(value=datetime.today().date(), description="End date")
     end_time_text = Text(value="23:59:00", description="Time")
@@ -245,84 +716,143 @@ def report_gui():
     comment_hutch = Dropdown(options=list(hutch_colors.keys()), value="Other", description="Hutch")
     add_comment_btn = Button(description="Add Comment", button_style="info")
     remove_comment_btn = Button(description="Remove", button_style="danger")
+    detect_comment_btn = Button(description="Detect Downtime", button_style="info")
     comment_list = Select(options=[], rows=4, description="Comments", layout=widgets.Layout(width="600px"))
 
     out_plot = widgets.Output()
-    hutch_patches = []
-    comment_patches = []
+    # 둘 다 start 순으로 정렬된 schedule.Schedule (목록 번호도 시간순)
+    hutch_patches = schedule.Schedule()
+    comment_patches = schedule.Schedule(with_issue=True)
 
     # --- Callbacks ---
     def refresh_program_list():
-        program_list.options = [f"{i+1}. {d}, {m} min, {h}" for i,(d,m,h) in enumerate(hutch_patches)]
+        program_list.options = hutch_patches.select_labels()
 
     def add_hutch(_):
-        hutch_patches.append((hutch_date.value, hutch_minutes.value, hutch_name.value))
+        hutch_patches.add((hutch_date.value, hutch_minutes.value, hutch_name.value))
         refresh_program_list()
 
     def remove_hutch(_):
         if program_list.index is not None and program_list.index >= 0:
-            del hutch_patches[program_list.index]
+            hutch_patches.remove(program_list.index)
             refresh_program_list()
 
     def update_hutch(_):
-        if program_list.value:  
-            idx = program_list.options.index(program_list.value)
-            hutch_patches[idx] = (hutch_date.value, hutch_minutes.value, hutch_name.value)
+        if program_list.index is not None and program_list.index >= 0:
+            hutch_patches.replace(program_list.index, (hutch_date.value, hutch_minutes.value, hutch_name.value))
             refresh_program_list()
     
     def on_hutch_select(change):
-        if change["new"]:
-            idx = program_list.options.index(change["new"])
-            date, minutes, hutch = hutch_patches[idx]
+        if change["new"] is not None and program_list.index is not None:
+            date, minutes, hutch = hutch_patches[program_list.index]
             hutch_date.value = date
             hutch_minutes.value = minutes
             hutch_name.value = hutch
 
     program_list.observe(on_hutch_select, names="value")
 
+    def refresh_comment_list():
+        comment_list.options = comment_patches.select_labels()
+
     def add_comment(_):
-        comment_patches.append((comment_date.value, comment_minutes.value, comment_issue.value, comment_hutch.value))
-        comment_list.options = [f"{i+1}. {d}, {m} min, {issue} ({h})" for i,(d,m,issue,h) in enumerate(comment_patches)]
+        comment_patches.add((comment_date.value, comment_minutes.value, comment_issue.value, comment_hutch.value))
+        refresh_comment_list()
 
     def remove_comment(_):
         if comment_list.index is not None and comment_list.index >= 0:
-            del comment_patches[comment_list.index]
-            comment_list.options = [f"{i+1}. {d}, {m} min, {issue} ({h})" for i,(d,m,issue,h) in enumerate(comment_patches)]
+            comment_patches.remove(comment_list.index)
+            refresh_comment_list()
 
+    # sync / report 는 background thread 에서 (notebook 이 멈추지 않게), 한 번에 하나만
     def sync_program(_):
         selected_date = end_date_picker.value.strftime("%Y-%m-%d")
         selected_datetime = f"{selected_date} {end_time_text.value}"
-        count = sync_hutch_from_calendar_noics( selected_datetime, period.value, hutch_patches)
-        refresh_program_list()
-        with out_plot:
-            print(f"{count} events synced from {hutch_name.value} calendar")
+
+        def work(session, progress):
+            return sync_hutch_from_calendar_noics( selected_datetime, period.value, hutch_patches,
+                                                  session=session, progress=progress, details=True)
+
+        def done(result, error):
+            refresh_program_list()
+            if result and not error:
+                count, timings, failures = result
+                task.status.value += (f"{count} new events from {len(timings) - len(failures)} calendars "
+                                      f"(slowest {max(timings.values(), default=0):.1f}s)")
+            conflicts = program_conflicts(hutch_patches)
+            if conflicts:
+                task.status.value += "<br><b>HXR conflicts:</b> " + "; ".join(
+                    html.escape(f"{start} {minutes} min {a} / {b}") for start, minutes, a, b in conflicts)
+
+        task.start("Calendar sync", list(hutch_calendars), work, done)
 
     def run_report(_):
-        with out_plot:
+        selected_date = end_date_picker.value.strftime("%Y-%m-%d")
+        selected_datetime = f"{selected_date} {end_time_text.value}"
+        programs, comments = hutch_patches.copy(), comment_patches.copy()
+
+        def work(session, progress):
+            # figure 는 PNG 로 만들어서 Output 에 붙임 (thread 에서 plt.show 는 notebook 에 안 나옴)
+            buf = io.BytesIO()
+            report_range(selected_datetime, period.value, hutch_patches=programs, comment_patches=comments,
+                         output=buf, session=session, progress=progress)
+            progress("plot", "done")
+            return buf.getvalue()
+
+        def done(png, error):
             out_plot.clear_output()
-            selected_date = end_date_picker.value.strftime("%Y-%m-%d")
-            selected_datetime = f"{selected_date} {end_time_text.value}"
-            report_range(selected_datetime, period.value,
-                         hutch_patches=hutch_patches,
-                         comment_patches=comment_patches)
+            if png and not error:
+                out_plot.append_display_data(Image(data=png, format="png"))
+
+        task.start("Report", list(epics_pvs) + ["plot"], work, done)
+
+    def detect_comments(_):
+        selected_date = end_date_picker.value.strftime("%Y-%m-%d")
+        selected_datetime = f"{selected_date} {end_time_text.value}"
+        programs = hutch_patches.copy()
+
+        def work(session, progress):
+            start_dt, end_dt = report_window(selected_datetime, period.value)
+            chunk = fetch_chunk if end_dt - start_dt > fetch_chunk else None
+            pv_dfs, _ = fetch_all_pvs(start_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt),
+                                      end_dt.astimezone(pytz.UTC).strftime(archiver_time_fmt),
+                                      chunk=chunk, session=session, progress=progress)
+            return detect_downtime(selected_datetime, period.value, programs, pv_dfs=pv_dfs)
+
+        def done(found, error):
+            if found and not error:
+                # 이미 있는 comment (같은 start, 길이, issue, hutch) 는 다시 넣지 않음
+                added = comment_patches.extend(found)
+                refresh_comment_list()
+                task.status.value += f"{added} downtime comments added ({len(found) - added} already listed)"
+
+        task.start("Downtime detection", list(epics_pvs), work, done)
 
     add_hutch_btn.on_click(add_hutch)
     remove_hutch_btn.on_click(remove_hutch)
     update_hutch_btn.on_click(update_hutch)
     sync_hutch_btn.on_click(sync_program)
     add_comment_btn.on_click(add_comment)
+    detect_comment_btn.on_click(detect_comments)
     remove_comment_btn.on_click(remove_comment)
 
     run_btn = Button(description="Generate Report", button_style="primary")
     run_btn.on_click(run_report)
 
+    cancel_btn = Button(description="Cancel", button_style="danger")
+    progress_bar = IntProgress(value=0, min=0, max=1, layout=widgets.Layout(width="400px"))
+    progress_status = HTML()
+    task = gui_tasks.BackgroundTask([sync_hutch_btn, run_btn, add_hutch_btn, update_hutch_btn, remove_hutch_btn,
+                                     detect_comment_btn],
+                                    cancel_btn, progress_bar, progress_status)
+
     return VBox([
         HBox([end_date_picker, end_time_text, period, sync_hutch_btn]),
         HBox([hutch_date, hutch_minutes, hutch_name, add_hutch_btn, update_hutch_btn, remove_hutch_btn]),
         program_list,
-        HBox([comment_date, comment_minutes, comment_hutch, add_comment_btn, remove_comment_btn]),
+        HBox([comment_date, comment_minutes, comment_hutch, add_comment_btn, remove_comment_btn, detect_comment_btn]),
         HBox([comment_issue]),
         comment_list,
-        run_btn,
+        HBox([run_btn, cancel_btn, progress_bar]),
+        progress_status,
         out_plot
     ])
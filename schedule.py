@@ -0,0 +1,251 @@
+import sys
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import numpy as np
+
+# --- program (hutch_patches) / comment (comment_patches) 목록 ---
+# (start_str, minutes, hutch) / (start_str, minutes, issue, hutch) 튜플 대신 column 배열로 들고 있음:
+#   start, end : int64 epoch seconds, start 순 정렬
+#   code       : hutch 의 index (labels), issue: 문자열 index (issues, comment 만)
+# 튜플 리스트를 받는 곳은 as_schedule() 로 한 번만 변환
+patch_time_fmt = "%Y-%m-%d %H:%M"
+schedule_tz = ZoneInfo("America/Los_Angeles")
+
+
+def _to_epoch(start_str, tz):
+    dt = datetime.strptime(start_str, patch_time_fmt)
+    # pytz 는 localize, zoneinfo 는 tzinfo 로
+    return int((tz.localize(dt) if hasattr(tz, "localize") else dt.replace(tzinfo=tz)).timestamp())
+
+
+class IntervalIndex:
+    # start 순 정렬된 (starts, ends) 위의 max-end segment tree (배열, leaf i = i 번째 항목)
+    # 겹치는 항목 조회는 level 마다 numpy 연산 한 번: O(log n + k). 배열이 바뀌면 새로 만듦 (O(n))
+    def __init__(self, starts, ends):
+        self.start = starts
+        self.end = ends
+        n = len(starts)
+        self.size = 1 << max(0, (n - 1).bit_length())
+        self.max_end = np.full(2 * self.size, np.iinfo(np.int64).min, dtype=np.int64)
+        self.max_end[self.size:self.size + n] = ends
+        lo = self.size // 2
+        while lo >= 1:
+            self.max_end[lo:2 * lo] = np.maximum(self.max_end[2 * lo:4 * lo:2], self.max_end[2 * lo + 1:4 * lo:2])
+            lo //= 2
+
+    def _descend(self, hi, min_end):
+        # index < hi 이고 end >= min_end 인 항목들 (오름차순)
+        if hi <= 0:
+            return np.empty(0, dtype=np.int64)
+        nodes = np.array([1], dtype=np.int64)
+        span = self.size
+        while True:
+            # node 의 첫 leaf 가 hi 앞이고 subtree 의 max end 가 min_end 이상인 것만 남김
+            first = (nodes - (self.size // span)) * span
+            nodes = nodes[(first < hi) & (self.max_end[nodes] >= min_end)]
+            if span == 1 or len(nodes) == 0:
+                return nodes - self.size
+            nodes = np.stack([2 * nodes, 2 * nodes + 1], axis=1).ravel()
+            span //= 2
+
+    def overlap(self, t0, t1):
+        # [t0, t1] 와 겹치는 (끝점 포함) 항목
+        return self._descend(int(np.searchsorted(self.start, t1, side="right")), t0)
+
+    def stab(self, t):
+        # t 에 진행 중인 항목 (start <= t < end)
+        return self._descend(int(np.searchsorted(self.start, t, side="right")), int(np.floor(t)) + 1)
+
+
+class Schedule:
+    # 같은 (start, end, hutch, issue) 는 한 번만 들어감
+    # 위치 찾기 / 범위 조회는 O(log n) (searchsorted), 삽입 / 삭제는 그 위치에서 배열을 한 번 옮김
+    def __init__(self, with_issue=False, tz=None):
+        self.with_issue = with_issue
+        self.tz = tz or schedule_tz
+        self.start = np.empty(0, dtype=np.int64)
+        self.end = np.empty(0, dtype=np.int64)
+        self.code = np.empty(0, dtype=np.int16)
+        self.issue = np.empty(0, dtype=np.int32)
+        self.labels = []        # hutch 이름 (categorical)
+        self.issues = []        # issue 문자열 (intern)
+        self._label_code = {}
+        self._issue_code = {}
+        self._keys = set()
+        self._index = None
+
+    @classmethod
+    def from_patches(cls, patches, tz=None, with_issue=None):
+        patches = list(patches)
+        if with_issue is None:
+            with_issue = bool(patches) and len(patches[0]) >= 4
+        sched = cls(with_issue, tz)
+        sched.extend(patches)
+        return sched
+
+    def copy(self):
+        # 배열은 삽입 / 삭제 때 새로 만들어지므로 공유해도 됨
+        other = Schedule(self.with_issue, self.tz)
+        other.__dict__.update(self.__dict__)
+        other.labels, other.issues = list(self.labels), list(self.issues)
+        other._label_code, other._issue_code = dict(self._label_code), dict(self._issue_code)
+        other._keys = set(self._keys)
+        return other
+
+    def __len__(self):
+        return len(self.start)
+
+    def __getitem__(self, i):
+        start_str = datetime.fromtimestamp(int(self.start[i]), self.tz).strftime(patch_time_fmt)
+        minutes = int(self.end[i] - self.start[i]) // 60
+        if self.with_issue:
+            return start_str, minutes, self.issues[self.issue[i]], self.labels[self.code[i]]
+        return start_str, minutes, self.labels[self.code[i]]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def rows(self):
+        return list(self)
+
+    def label(self, i):
+        return self.labels[self.code[i]]
+
+    def _encode(self, patch, add=True):
+        # add=False: 조회만 (label / issue 표를 늘리지 않음). 없는 label / issue 면 None
+        start = _to_epoch(patch[0], self.tz)
+        end = start + int(round(float(patch[1]) * 60))
+        hutch = str(patch[-1])
+        if hutch not in self._label_code:
+            if not add:
+                return None
+            self._label_code[hutch] = len(self.labels)
+            self.labels.append(hutch)
+        issue = -1
+        if self.with_issue:
+            text = sys.intern(str(patch[2]))
+            if text not in self._issue_code:
+                if not add:
+                    return None
+                self._issue_code[text] = len(self.issues)
+                self.issues.append(text)
+            issue = self._issue_code[text]
+        return start, end, self._label_code[hutch], issue
+
+    def _key(self, i):
+        return int(self.start[i]), int(self.end[i]), int(self.code[i]), int(self.issue[i])
+
+    def __contains__(self, patch):
+        key = self._encode(patch, add=False)
+        return key is not None and key in self._keys
+
+    def add(self, patch):
+        # returns 들어간 위치, 이미 있으면 None
+        key = self._encode(patch)
+        if key in self._keys:
+            return None
+        start, end, code, issue = key
+        i = int(np.searchsorted(self.start, start, side="right"))
+        self.start = np.insert(self.start, i, start)
+        self.end = np.insert(self.end, i, end)
+        self.code = np.insert(self.code, i, code)
+        self.issue = np.insert(self.issue, i, issue)
+        self._keys.add(key)
+        self._index = None
+        return i
+
+    def extend(self, patches):
+        # 여러 개는 한 번에 합쳐서 정렬. returns 새로 들어간 수
+        new = []
+        for p in patches:
+            key = self._encode(p)
+            if key not in self._keys:
+                self._keys.add(key)
+                new.append(key)
+        if not new:
+            return 0
+        arr = np.array(new, dtype=np.int64).reshape(-1, 4)
+        start = np.concatenate([self.start, arr[:, 0]])
+        order = np.argsort(start, kind="stable")
+        self.start = start[order]
+        self.end = np.concatenate([self.end, arr[:, 1]])[order]
+        self.code = np.concatenate([self.code, arr[:, 2].astype(np.int16)])[order]
+        self.issue = np.concatenate([self.issue, arr[:, 3].astype(np.int32)])[order]
+        self._index = None
+        return len(new)
+
+    def remove(self, i):
+        # i 번째 항목을 지우고 그 튜플을 돌려줌
+        row = self[i]
+        self._keys.discard(self._key(i))
+        self.start = np.delete(self.start, i)
+        self.end = np.delete(self.end, i)
+        self.code = np.delete(self.code, i)
+        self.issue = np.delete(self.issue, i)
+        self._index = None
+        return row
+
+    def replace(self, i, patch):
+        # returns 새 위치 (같은 항목이 이미 있으면 None, 이때 i 는 지워진 상태)
+        self.remove(i)
+        return self.add(patch)
+
+    def find(self, patch):
+        # returns 위치 또는 None
+        key = self._encode(patch, add=False)
+        if key is None or key not in self._keys:
+            return None
+        lo = int(np.searchsorted(self.start, key[0], side="left"))
+        hi = int(np.searchsorted(self.start, key[0], side="right"))
+        for i in range(lo, hi):
+            if self._key(i) == key:
+                return i
+        return None
+
+    @property
+    def index(self):
+        # 바뀐 뒤 처음 조회할 때 다시 만듦
+        if self._index is None:
+            self._index = IntervalIndex(self.start, self.end)
+        return self._index
+
+    def query(self, t0, t1):
+        # [t0, t1] 와 겹치는 항목의 index (start 순)
+        return self.index.overlap(t0, t1)
+
+    def at(self, t):
+        # 시각 t 에 진행 중인 항목의 index
+        return self.index.stab(t)
+
+    def codes(self, labels):
+        # labels 중 이 schedule 에 있는 것들의 code
+        return [self._label_code[h] for h in labels if h in self._label_code]
+
+    def conflicts(self, labels=None):
+        # labels (None: 전부) 의 서로 다른 hutch 항목이 겹치는 쌍 (끝과 시작이 맞닿는 것은 제외)
+        # returns (i, j, t0, t1) 배열들: i < j 는 schedule index, [t0, t1) 는 겹친 구간
+        sub = np.arange(len(self)) if labels is None else np.flatnonzero(np.isin(self.code, self.codes(labels)))
+        start, end = self.start[sub], self.end[sub]
+        # start 순이므로 k 번째와 겹치는 뒤 항목은 k+1 .. (start < end[k] 인 마지막) 까지
+        stop = np.searchsorted(start, end, side="left")
+        count = np.maximum(stop - np.arange(len(sub)) - 1, 0)
+        a = np.repeat(np.arange(len(sub)), count)
+        b = a + 1 + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        # 길이 0 인 항목 (start == end) 은 어떤 구간과도 겹치지 않음
+        keep = (self.code[sub[a]] != self.code[sub[b]]) & (start[b] < end[b])
+        a, b = a[keep], b[keep]
+        return sub[a], sub[b], start[b], np.minimum(end[a], end[b])
+
+    def select_labels(self):
+        # GUI Select 의 options
+        if self.with_issue:
+            return [f"{i+1}. {d}, {m} min, {issue} ({h})" for i, (d, m, issue, h) in enumerate(self)]
+        return [f"{i+1}. {d}, {m} min, {h}" for i, (d, m, h) in enumerate(self)]
+
+
+def as_schedule(patches, tz=None, with_issue=None):
+    # Schedule 은 그대로, 튜플 리스트 (notebook) 는 변환 (중복은 하나만)
+    if isinstance(patches, Schedule):
+        return patches
+    return Schedule.from_patches(patches, tz, with_issue)
@@ -0,0 +1,72 @@
+import os, sys
+from datetime import datetime, timezone
+import pytest
+
+# 모듈들이 repo 최상위에 있음
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pv_cache, pv_summary, report_gui
+
+
+@pytest.fixture
+def to_epoch():
+    # archiver 시간 문자열 ("2025-01-01T00:00:00.000Z") -> epoch seconds
+    def convert(s):
+        return datetime.strptime(s, report_gui.archiver_time_fmt).replace(tzinfo=timezone.utc).timestamp()
+    return convert
+
+
+@pytest.fixture
+def fake_archiver(tmp_path, monkeypatch):
+    # cache / summary DB 는 tmp_path 에 두고, fake_archiver(fetch) 로 archiver 대신 fetch(pv, start, end, session) 호출
+    monkeypatch.setattr(pv_cache, "pv_cache_path", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(pv_summary, "pv_summary_path", str(tmp_path / "summary.sqlite"))
+
+    def install(fetch):
+        monkeypatch.setattr(report_gui, "_fetch_pv_csv", fetch)
+    return install
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {"ETag": '"v1"'}
+
+    def __init__(self, body, chunk=100, fail_after=None):
+        # chunk: iter_content 가 돌려주는 크기 (chunk_size 무시), fail_after: 이 byte 부터 끊긴 것처럼 ConnectionError
+        self.content, self.chunk, self.fail_after = body, chunk, fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), self.chunk):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("response closed")
+            yield self.content[i:i + self.chunk]
+
+
+class FakeSession:
+    def __init__(self, body, **response_args):
+        # body: bytes, 또는 url -> bytes 함수
+        self.body, self.response_args = body, response_args
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        body = self.body(url) if callable(self.body) else self.body
+        return FakeResponse(body, **self.response_args)
+
+
+@pytest.fixture
+def fake_session():
+    # fake_session(body, chunk=..., fail_after=...) -> requests.Session 대신 쓰는 객체 (.calls 에 (url, kwargs))
+    return FakeSession
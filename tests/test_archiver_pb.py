@@ -0,0 +1,86 @@
+import struct
+from datetime import datetime, timezone
+import numpy as np
+
+import archiver_pb
+import report_gui
+
+
+def varint(n):
+    out = b""
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out += bytes([b | 0x80])
+        else:
+            return out + bytes([b])
+
+
+def escape(line):
+    return line.replace(b"\x1b", b"\x1b\x01").replace(b"\n", b"\x1b\x02").replace(b"\r", b"\x1b\x03")
+
+
+def payload_info(ptype, pv, year):
+    return b"\x08" + varint(ptype) + b"\x12" + varint(len(pv)) + pv.encode() + b"\x18" + varint(year)
+
+
+def sample(ptype, secs, nano, val, severity=None):
+    line = b"\x08" + varint(secs)
+    if nano:
+        line += b"\x10" + varint(nano)
+    if ptype == archiver_pb.SCALAR_DOUBLE:
+        line += b"\x19" + struct.pack("<d", val)
+    elif ptype == archiver_pb.SCALAR_FLOAT:
+        line += b"\x1d" + struct.pack("<f", val)
+    if severity is not None:
+        line += b"\x20" + varint(severity)
+    return line
+
+
+def make_chunks(chunks):
+    # chunks: [(ptype, year, [(secs, nano, val)])] -> (getData.raw body, getData.csv body)
+    raw, csv = [], []
+    for ptype, year, rows in chunks:
+        year_start = datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()
+        lines = [escape(payload_info(ptype, "TEST:PV", year))]
+        for k, (secs, nano, val) in enumerate(rows):
+            lines.append(escape(sample(ptype, secs, nano, val, severity=0 if k % 3 == 0 else None)))
+            if ptype == archiver_pb.SCALAR_FLOAT:
+                val = float(np.float32(val))
+            csv.append(f"{year_start + secs + nano * 1e-9!r},{val!r},0,0,\n")
+        raw.append(b"\n".join(lines) + b"\n")
+    return b"\n".join(raw), "".join(csv).encode()
+
+
+def test_decode_pb_matches_csv(fake_session):
+    rng = np.random.default_rng(0)
+    doubles = [(int(s), int(n), float(v)) for s, n, v in
+               zip(np.sort(rng.integers(0, 30_000_000, 200)), rng.integers(0, 10**9, 200), rng.normal(size=200))]
+    # 값 / 시간 byte 에 \n, \r, 0x1b 가 들어가는 줄 (escape), nano 가 0 이라 빠진 줄
+    doubles += [(31_000_000, 5, struct.unpack("<d", b"\n\r\x1b\n\r\x1b\x0a\x3f")[0]),
+                (31_000_001, 0, 1.5), (31_000_002, 0x0A, 2.5)]
+    floats = [(int(s), int(n), float(v)) for s, n, v in
+              zip(np.sort(rng.integers(0, 1_000_000, 50)), rng.integers(0, 10**9, 50), rng.normal(size=50))]
+    raw, csv = make_chunks([(archiver_pb.SCALAR_DOUBLE, 2024, doubles), (archiver_pb.SCALAR_FLOAT, 2025, floats)])
+
+    ts, values = archiver_pb.decode_pb(raw)
+    # 7 byte 씩 받아서 block 경계가 줄 중간에 걸리게
+    session = fake_session(lambda url: raw if "getData.raw" in url else csv, chunk=7)
+    pb_df = report_gui._fetch_pv_pb("TEST:PV", "2024-01-01T00:00:00.000Z", "2025-02-01T00:00:00.000Z", session)
+    csv_df = report_gui._fetch_pv_csv("TEST:PV", "2024-01-01T00:00:00.000Z", "2025-02-01T00:00:00.000Z", session)
+
+    assert len(ts) == len(doubles) + len(floats) == len(csv_df)
+    np.testing.assert_allclose(ts, [float(line.split(b",")[0]) for line in csv.splitlines()], rtol=0, atol=1e-6)
+    # read_csv 의 기본 float parser 는 마지막 몇 자리가 다를 수 있음 (round-trip 정밀도 아님)
+    np.testing.assert_allclose(pb_df["Value1"].to_numpy(), csv_df["Value1"].to_numpy(), rtol=1e-12, atol=0)
+    np.testing.assert_array_equal(values, pb_df["Value1"].to_numpy())
+    dt = (pb_df["Timestamp"] - csv_df["Timestamp"]).dt.total_seconds().abs()
+    assert dt.max() < 1e-6
+    # stream 으로 받아야 CancellableSession.cancel 이 받는 도중에 끊을 수 있음
+    assert [kwargs.get("stream") for _, kwargs in session.calls] == [True, True]
+
+
+def test_decode_pb_empty():
+    ts, values = archiver_pb.decode_pb(b"")
+    assert len(ts) == 0 and len(values) == 0
@@ -0,0 +1,29 @@
+import numpy as np
+
+import beam_stats
+
+
+def test_downtime_runs_split_only_at_gaps():
+    t = np.arange(0.0, 3600.0, 1.0)
+    v = np.where((t >= 600) & (t < 1800), 0.0, 1.0)
+    # down 구간 안에 archiver 공백 (10 분)
+    keep = (t < 1000) | (t >= 1600)
+    starts, ends = beam_stats.downtime_runs(t[keep], v[keep], 0.05, 0.1, min_duration=60, max_gap=60)
+    # 공백 앞 마지막 샘플 (999 s) 은 유효 시간 0 -> 구간은 거기서 끝남
+    assert starts.tolist() == [600.0, 1600.0]
+    assert ends.tolist() == [999.0, 1800.0]
+
+
+def test_downtime_runs_repeated_timestamps_continue_run():
+    t = np.arange(0.0, 3600.0, 1.0)
+    v = np.where((t >= 600) & (t < 1800), 0.0, 1.0)
+    # 같은 timestamp 가 두 번씩 나오는 구간
+    t = np.sort(np.r_[t, t[700:900]])
+    v = np.where((t >= 600) & (t < 1800), 0.0, 1.0)
+    starts, ends = beam_stats.downtime_runs(t, v, 0.05, 0.1, min_duration=60, max_gap=60)
+    assert starts.tolist() == [600.0] and ends.tolist() == [1800.0]
+
+
+def test_hysteresis_keeps_state_between_thresholds():
+    v = np.array([1.0, 0.07, 0.01, 0.07, 0.2, 0.07, np.nan])
+    assert beam_stats.hysteresis_down(v, 0.05, 0.1).tolist() == [False, False, True, True, False, False, False]
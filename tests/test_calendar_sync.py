@@ -0,0 +1,41 @@
+import pytest
+
+import report_gui
+import schedule
+
+
+def fake_calendars(monkeypatch, events):
+    def fetch(hutch, url, start_dt, end_dt, session=None, timeout=None):
+        if hutch == "BAD":
+            raise OSError("unreachable")
+        return [(start, minutes, hutch) for start, minutes in events]
+    monkeypatch.setattr(report_gui, "fetch_calendar_patches", fetch)
+
+
+def test_sync_returns_count(monkeypatch):
+    fake_calendars(monkeypatch, [("2025-09-14 06:00", 720), ("2025-09-15 06:00", 720)])
+    calendars = {"CXI": "https://example/cxi.ics", "TMO": "https://example/tmo.ics"}
+    hutch_patches = []
+    count = report_gui.sync_hutch_from_calendar_noics("2025-09-15 23:59", "7d", hutch_patches, calendars=calendars)
+    assert count == 4 and len(hutch_patches) == 4
+    # 다시 해도 같은 program 은 추가하지 않음
+    assert report_gui.sync_hutch_from_calendar_noics("2025-09-15 23:59", "7d", hutch_patches,
+                                                     calendars=calendars) == 0
+
+
+def test_sync_details(monkeypatch):
+    fake_calendars(monkeypatch, [("2025-09-14 06:00", 720)])
+    calendars = {"CXI": "https://example/cxi.ics", "BAD": "https://example/bad.ics"}
+    programs = schedule.Schedule()
+    count, timings, failures = report_gui.sync_hutch_from_calendar_noics(
+        "2025-09-15 23:59", "7d", programs, calendars=calendars, details=True)
+    assert count == 1 and len(programs) == 1
+    assert set(timings) == {"CXI", "BAD"} and list(failures) == ["BAD"]
+
+
+def test_sync_warns_on_failure_without_details(monkeypatch):
+    fake_calendars(monkeypatch, [("2025-09-14 06:00", 720)])
+    calendars = {"CXI": "https://example/cxi.ics", "BAD": "https://example/bad.ics"}
+    with pytest.warns(RuntimeWarning, match="BAD: OSError: unreachable"):
+        count = report_gui.sync_hutch_from_calendar_noics("2025-09-15 23:59", "7d", [], calendars=calendars)
+    assert count == 1
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import beam_stats
+import decimate
+
+
+def frame(t, v):
+    return pd.DataFrame({"Timestamp": pd.to_datetime(t, unit="s", utc=True), "Value1": v})
+
+
+def breaks_between(out, t_before, t_after):
+    # t_before 와 t_after 사이 (양 끝 sample 포함) 에 NaN 행이 있는지
+    t = beam_stats.epoch_seconds(out["Timestamp"])
+    i = np.flatnonzero(t == t_before)[-1]
+    j = np.flatnonzero(t == t_after)[0]
+    return np.isnan(out["Value1"].to_numpy()[i:j + 1]).any()
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_nan_run_kept_as_break(method):
+    t = np.arange(0.0, 20000.0)
+    v = np.sin(t / 100)
+    v[5000:5100] = np.nan
+    out = decimate.decimate_df(frame(t, v), 200, method)
+    y = out["Value1"].to_numpy()
+    assert len(out) < len(t)
+    assert np.isnan(y).sum() == 1
+    k = np.flatnonzero(np.isnan(y))[0]
+    ts = beam_stats.epoch_seconds(out["Timestamp"])
+    assert ts[k - 1] < 5000 <= ts[k] < ts[k + 1] and ts[k + 1] >= 5100
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb", "stride"])
+def test_gap_gets_nan_row(method):
+    t = np.r_[np.arange(0.0, 10000.0), np.arange(13600.0, 23600.0)]
+    v = np.cos(t / 50)
+    out = decimate.decimate_df(frame(t, v), 200, method, max_gap=60)
+    assert out["Timestamp"].is_monotonic_increasing
+    # gap 양쪽 sample 은 남고 그 사이는 NaN 으로 끊김
+    assert breaks_between(out, 9999, 13600)
+    assert np.isnan(out["Value1"].to_numpy()).sum() == 1
+    # 나머지 행은 원래 값 그대로
+    kept = out.dropna()
+    assert np.array_equal(kept["Value1"].to_numpy(), v[kept.index.to_numpy()])
+
+
+def test_small_frame_still_breaks_gaps():
+    t = np.array([0.0, 1.0, 2.0, 500.0, 501.0])
+    out = decimate.decimate_df(frame(t, np.ones(5)), 1000, "minmax", max_gap=60)
+    assert np.isnan(out["Value1"].to_numpy()).tolist() == [False, False, False, True, False, False]
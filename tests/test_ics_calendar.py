@@ -0,0 +1,112 @@
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import pytest
+
+import ics_calendar
+
+LA = ZoneInfo("America/Los_Angeles")
+
+# 매주 월요일 09:00-21:00 (LA), 6 번. 3/10 (DST 시작 다음 날) 은 EXDATE,
+# 3/17 은 RECURRENCE-ID 로 10:00-14:00 로 옮기고, 3/24 는 취소
+FEED = """BEGIN:VCALENDAR
+X-WR-TIMEZONE:America/Los_Angeles
+BEGIN:VEVENT
+UID:weekly@test
+DTSTART;TZID=America/Los_Angeles:20250224T090000
+DTEND;TZID=America/Los_Angeles:20250224T210000
+RRULE:FREQ=WEEKLY;COUNT=6
+EXDATE;TZID=America/Los_Angeles:20250310T090000
+END:VEVENT
+BEGIN:VEVENT
+UID:weekly@test
+RECURRENCE-ID;TZID=America/Los_Angeles:20250317T090000
+DTSTART;TZID=America/Los_Angeles:20250317T100000
+DTEND;TZID=America/Los_Angeles:20250317T140000
+SEQUENCE:1
+END:VEVENT
+BEGIN:VEVENT
+UID:weekly@test
+RECURRENCE-ID;TZID=America/Los_Angeles:20250324T090000
+DTSTART;TZID=America/Los_Angeles:20250324T090000
+DTEND;TZID=America/Los_Angeles:20250324T210000
+STATUS:CANCELLED
+END:VEVENT
+BEGIN:VEVENT
+UID:single@test
+DTSTART:20250305T170000Z
+DURATION:PT2H
+END:VEVENT
+BEGIN:VEVENT
+UID:allday@test
+DTSTART;VALUE=DATE:20250401
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def epoch(*args):
+    return datetime(*args, tzinfo=LA).timestamp()
+
+
+def local(events):
+    return [(uid, datetime.fromtimestamp(start, LA).strftime("%m-%d %H:%M"), (end - start) / 3600)
+            for uid, start, end in events]
+
+
+def stored(tmp_path, feed=FEED):
+    ics_calendar.update_store("cal", ics_calendar.parse_ics_events(feed), str(tmp_path))
+
+
+def test_rrule_exdate_and_overrides(tmp_path):
+    stored(tmp_path)
+    events = ics_calendar.query_events("cal", epoch(2025, 2, 1), epoch(2025, 5, 1), str(tmp_path))
+    assert local(events) == [
+        ("weekly@test", "02-24 09:00", 12.0),
+        ("weekly@test", "03-03 09:00", 12.0),
+        ("single@test", "03-05 09:00", 2.0),
+        ("weekly@test", "03-17 10:00", 4.0),     # override
+        ("weekly@test", "03-31 09:00", 12.0),    # DST 뒤에도 wall time 09:00
+        ("allday@test", "04-01 00:00", 24.0),
+    ]
+
+
+def test_expansion_limited_to_window(tmp_path):
+    stored(tmp_path)
+    events = ics_calendar.query_events("cal", epoch(2025, 3, 3, 20), epoch(2025, 3, 17, 11), str(tmp_path))
+    assert local(events) == [("weekly@test", "03-03 09:00", 12.0), ("single@test", "03-05 09:00", 2.0),
+                             ("weekly@test", "03-17 10:00", 4.0)]
+    assert ics_calendar.query_events("cal", epoch(2025, 4, 3), epoch(2025, 12, 31), str(tmp_path)) == []
+
+
+def test_expand_occurrences_skips_exdates():
+    start, end = epoch(2025, 2, 24, 9), epoch(2025, 2, 24, 21)
+    occ = list(ics_calendar.expand_occurrences(start, end, "FREQ=DAILY;COUNT=5", [epoch(2025, 2, 26, 9)],
+                                               "America/Los_Angeles", epoch(2025, 2, 25), epoch(2025, 3, 1),
+                                               skip=[epoch(2025, 2, 27, 9)]))
+    assert [datetime.fromtimestamp(s, LA).day for s, _ in occ] == [25, 28]
+    assert all(e - s == 12 * 3600 for s, e in occ)
+
+
+def test_update_store_removes_dropped_events(tmp_path):
+    stored(tmp_path)
+    stored(tmp_path, FEED.replace("UID:single@test", "UID:other@test"))
+    uids = {uid for uid, _, _ in ics_calendar.query_events("cal", epoch(2025, 3, 5), epoch(2025, 3, 6),
+                                                            str(tmp_path))}
+    assert uids == {"other@test"}
+
+
+def test_refresh_feed_stores_body(tmp_path, fake_session):
+    url = "https://example/cal.ics"
+    assert ics_calendar.refresh_feed(url, fake_session(FEED.encode()), cache_dir=str(tmp_path)) == "200"
+    body_path, _ = ics_calendar._cache_paths(url, str(tmp_path))
+    assert open(body_path, "rb").read() == FEED.encode()
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+
+
+def test_refresh_feed_removes_partial_body(tmp_path, fake_session):
+    url = "https://example/cal.ics"
+    with pytest.raises(ConnectionError):
+        ics_calendar.refresh_feed(url, fake_session(FEED.encode(), fail_after=300),
+                                  cache_dir=str(tmp_path))
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp") or f.endswith(".ics")]
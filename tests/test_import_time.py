@@ -0,0 +1,9 @@
+import bench_import_time
+
+
+def test_report_gui_import_is_lazy_and_fast():
+    # 새 process 에서 import report_gui (best of 3)
+    times, loaded = bench_import_time.import_times("report_gui", repeat=3)
+    eager = sorted(m for m in bench_import_time.lazy_modules if m in loaded)
+    assert eager == []
+    assert times["report_gui"][1] / 1000 <= bench_import_time.import_budget_ms
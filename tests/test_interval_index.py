@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import report_gui
+import schedule
+
+HXR = ["CXI", "MFX", "XPP"]
+
+
+def random_schedule(n, seed):
+    rng = np.random.default_rng(seed)
+    programs = schedule.Schedule()
+    start = np.sort(rng.integers(0, 10**6, n)).astype(np.int64)
+    minutes = rng.integers(0, 3000, n)
+    minutes[rng.random(n) < 0.02] = 10**5    # 아주 긴 program 도 몇 개
+    minutes[rng.random(n) < 0.05] = 0        # 길이 0 인 program 도 몇 개
+    programs.start = 1_700_000_040 + start * 60
+    programs.end = programs.start + minutes * 60
+    programs.labels = ["CXI", "MFX", "XPP", "TMO"]
+    programs.code = rng.integers(0, 4, n).astype(np.int16)
+    programs.issue = np.full(n, -1, dtype=np.int32)
+    programs._label_code = {h: i for i, h in enumerate(programs.labels)}
+    return programs, rng
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 7, 64, 1000])
+def test_query_and_stab_match_brute_force(n):
+    programs, rng = random_schedule(n, n)
+    lo = int(programs.start.min()) - 5000 if n else 0
+    hi = int(programs.end.max()) + 5000 if n else 10
+    for _ in range(200):
+        t0 = int(rng.integers(lo, hi))
+        t1 = t0 + int(rng.integers(0, 20000))
+        expected = np.flatnonzero((programs.start <= t1) & (programs.end >= t0))
+        np.testing.assert_array_equal(programs.query(t0, t1), expected)
+        expected = np.flatnonzero((programs.start <= t0) & (programs.end > t0))
+        np.testing.assert_array_equal(programs.at(t0), expected)
+        np.testing.assert_array_equal(programs.at(t0 + 0.5), expected)
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, 64, 400])
+def test_conflicts_match_brute_force(n):
+    programs, _ = random_schedule(n, n + 1)
+    i, j, t0, t1 = programs.conflicts(HXR)
+    expected = {(a, b) for a in range(n) for b in range(a + 1, n)
+                if programs.label(a) in HXR and programs.label(b) in HXR and programs.code[a] != programs.code[b]
+                and max(programs.start[a], programs.start[b]) < min(programs.end[a], programs.end[b])}
+    assert set(zip(i.tolist(), j.tolist())) == expected
+    np.testing.assert_array_equal(t0, np.maximum(programs.start[i], programs.start[j]))
+    np.testing.assert_array_equal(t1, np.minimum(programs.end[i], programs.end[j]))
+
+
+def test_index_rebuilt_after_changes():
+    programs = schedule.Schedule.from_patches([("2025-09-14 06:00", 720, "CXI")])
+    t = programs.start[0] + 60
+    assert programs.at(t).tolist() == [0]
+    programs.add(("2025-09-14 05:00", 120, "MFX"))
+    assert programs.at(t).tolist() == [0, 1]
+    programs.remove(1)
+    assert programs.at(t).tolist() == [0]
+
+
+def test_program_conflicts():
+    patches = [("2025-09-10 06:00", 720, "CXI"), ("2025-09-10 12:00", 720, "MFX"),
+               ("2025-09-10 12:00", 720, "TMO"), ("2025-09-10 18:00", 60, "CXI"),
+               ("2025-09-11 00:00", 60, "XPP"),     # MFX 끝과 맞닿기만 함
+               ("2025-09-10 08:00", 0, "MFX")]      # 길이 0 은 conflict 아님
+    assert report_gui.program_conflicts(patches) == [("2025-09-10 12:00", 360, "CXI", "MFX"),
+                                                     ("2025-09-10 18:00", 60, "MFX", "CXI")]
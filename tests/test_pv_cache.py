@@ -0,0 +1,78 @@
+import threading
+import numpy as np
+import pandas as pd
+
+import pv_cache
+
+
+def samples(ts, values=None):
+    values = np.arange(len(ts), dtype=float) if values is None else values
+    return pd.DataFrame({"Timestamp": pd.to_datetime(ts, unit="s", utc=True).tz_convert("America/Los_Angeles"),
+                         "Value1": values})
+
+
+def test_store_load_round_trip(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ts = 1.7e9 + np.arange(1000) * 0.5
+    values = np.sin(ts)
+    values[10] = np.nan
+    pv_cache.store("PV", ts[0], ts[-1], samples(ts, values), path=path, settle=0)
+
+    df = pv_cache.load("PV", ts[0], ts[-1], path=path)
+    np.testing.assert_array_equal((df["Timestamp"] - pd.Timestamp(0, tz="UTC")).dt.total_seconds(), ts)
+    np.testing.assert_array_equal(df["Value1"].to_numpy(), values)
+    assert len(pv_cache.load("OTHER", ts[0], ts[-1], path=path)) == 0
+
+
+def test_load_includes_sample_before_start(tmp_path):
+    # archiver 는 from 직전 샘플도 주므로 cache 도 같게
+    path = str(tmp_path / "cache.sqlite")
+    ts = 1.7e9 + np.array([0.0, 10.0, 20.0, 30.0])
+    pv_cache.store("PV", ts[0], ts[-1], samples(ts), path=path, settle=0)
+
+    df = pv_cache.load("PV", ts[0] + 15, ts[-1], path=path)
+    assert df["Value1"].tolist() == [1.0, 2.0, 3.0]
+    assert pv_cache.load("PV", ts[0], ts[-1], path=path)["Value1"].tolist() == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_missing_ranges(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    t0 = 1.7e9
+    assert pv_cache.missing_ranges("PV", t0, t0 + 100, path=path) == [(t0, t0 + 100)]
+
+    pv_cache.store("PV", t0 + 20, t0 + 40, samples([t0 + 20, t0 + 30]), path=path, settle=0)
+    pv_cache.store("PV", t0 + 35, t0 + 60, samples([t0 + 50]), path=path, settle=0)
+    assert pv_cache.missing_ranges("PV", t0, t0 + 100, path=path) == [(t0, t0 + 20), (t0 + 60, t0 + 100)]
+    assert pv_cache.missing_ranges("PV", t0 + 25, t0 + 55, path=path) == []
+    assert pv_cache.missing_ranges("OTHER", t0 + 25, t0 + 55, path=path) == [(t0 + 25, t0 + 55)]
+
+
+def test_recent_range_not_marked_covered(tmp_path):
+    # settle 안의 구간은 다음에 다시 받음
+    path = str(tmp_path / "cache.sqlite")
+    now = pd.Timestamp.now(tz="UTC").timestamp()
+    pv_cache.store("PV", now - 3600, now, samples([now - 3600]), path=path, settle=600)
+    gaps = pv_cache.missing_ranges("PV", now - 3600, now, path=path)
+    assert len(gaps) == 1 and gaps[0][0] <= now - 600 + 1 and gaps[0][1] == now
+
+
+def test_concurrent_first_connect(tmp_path):
+    # 새 cache 파일을 여러 thread 가 동시에 열어도 "database is locked" 가 나지 않음
+    errors = []
+
+    def open_cache(path, barrier):
+        barrier.wait()
+        try:
+            pv_cache.missing_ranges("PV", 0, 1, path=path)
+        except Exception as e:
+            errors.append(e)
+
+    for n in range(50):
+        barrier = threading.Barrier(8)
+        threads = [threading.Thread(target=open_cache, args=(str(tmp_path / f"{n}.sqlite"), barrier))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert errors == []
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+import pv_summary
+import report_gui
+
+
+def test_bin_edges_follow_la_midnight_across_dst():
+    start = pd.Timestamp("2025-03-08 12:00", tz="America/Los_Angeles").timestamp()
+    end = pd.Timestamp("2025-03-10 12:00", tz="America/Los_Angeles").timestamp()
+    starts, ends = pv_summary.bin_edges(start, end, "day")
+    assert (ends - starts).tolist() == [86400, 23 * 3600, 86400]
+    local = pd.to_datetime(starts, unit="s", utc=True).tz_convert("America/Los_Angeles")
+    assert all((local.hour == 0) & (local.minute == 0))
+
+
+def test_summarize_bins():
+    t = np.arange(0.0, 7200.0, 1.0)
+    v = np.where(t < 3600, 1.0, 0.0)
+    out = pv_summary.summarize(t, v, np.array([0.0, 3600.0]), np.array([3600.0, 7200.0]), 0.5)
+    assert out["count"].tolist() == [3600, 3600]
+    assert out["mean"].tolist() == [1.0, 0.0]
+    assert out["above"].tolist() == [3600, 0]
+    assert out["covered"].tolist() == [3600, 3599]
+
+
+def test_update_summaries_fills_every_bin_across_dst(fake_archiver, to_epoch):
+    # 30 일 (3/8 DST 전환 포함) 을 한 번에 채우면 빠진 day/hour bin 이 없어야 함
+    calls = []
+
+    def fetch(pv, start, end, session=None):
+        calls.append((start, end))
+        t = np.arange(np.ceil(to_epoch(start) / 60) * 60, to_epoch(end) + 1, 60.0)
+        return report_gui._arrays_to_df(t, np.ones(len(t)))
+
+    fake_archiver(fetch)
+    pvs = {"GMD": report_gui.epics_pvs["GMD"]}
+    start_dt, end_dt = report_gui.report_window("2025-03-31 23:59", "30d")
+    report_gui.update_summaries(start_dt, end_dt, pvs)
+
+    pv, threshold = pvs["GMD"][0], report_gui.beam_stats.availability_thresholds["GMD"]
+    for res in pv_summary.summary_resolutions:
+        starts, _ = pv_summary.missing_bins(pv, start_dt.timestamp(), end_dt.timestamp(), res, threshold)
+        assert len(starts) == 0, (res, pd.to_datetime(starts, unit="s", utc=True).tz_convert("America/Los_Angeles"))
+
+    df = pv_summary.load(pv, "day", threshold, start_dt.timestamp(), end_dt.timestamp())
+    assert len(df) == 31 and (df["covered"] > 0).all()
+    # 두 번째는 받을 것이 없음
+    calls.clear()
+    assert report_gui.update_summaries(start_dt, end_dt, pvs) == {"GMD": 0}
+    assert calls == []
@@ -0,0 +1,48 @@
+import threading, time
+import numpy as np
+
+import report_cli
+import report_gui
+
+
+def test_prefill_fetches_overlapping_jobs_once(fake_archiver, to_epoch):
+    fetched = {}
+
+    def fetch(pv, start, end, session=None):
+        t0, t1 = to_epoch(start), to_epoch(end)
+        fetched.setdefault(pv, []).append((t0, t1))
+        ts = np.arange(t0, t1, 60.0)
+        return report_gui._arrays_to_df(ts, np.ones(len(ts)))
+
+    fake_archiver(fetch)
+    jobs = [("2025-09-08 23:59", "7d"), ("2025-09-12 23:59", "7d"), ("2025-09-15 23:59", "7d")]
+    assert report_cli.prefill_cache(jobs) == {}
+
+    for pv, ranges in fetched.items():
+        ranges.sort()
+        # 받은 구간끼리 겹치지 않고, 합치면 세 job 의 창 전체
+        assert all(a[1] <= b[0] for a, b in zip(ranges, ranges[1:]))
+        start, _ = report_gui.report_window(*jobs[0])
+        _, end = report_gui.report_window(*jobs[-1])
+        assert sum(t1 - t0 for t0, t1 in ranges) == end.timestamp() - start.timestamp()
+
+
+def test_fetch_connections_capped(fake_archiver, to_epoch, monkeypatch):
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def fetch(pv, start, end, session=None):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return report_gui._arrays_to_df(np.array([to_epoch(start)]), np.ones(1))
+
+    fake_archiver(fetch)
+    monkeypatch.setattr(report_gui, "_fetch_slots", threading.BoundedSemaphore(3))
+    # PV 2 개 x 8 일 chunk 4 개씩 -> 제한이 없으면 8 개가 동시에
+    report_gui.fetch_all_pvs("2025-09-01T00:00:00.000Z", "2025-09-09T00:00:00.000Z",
+                             chunk=report_gui.fetch_chunk)
+    assert active[1] <= 3
@@ -0,0 +1,35 @@
+import re
+import numpy as np
+
+import report_gui
+
+
+def fake_binned_archiver(calls, to_epoch):
+    # 1 Hz 샘플 (값 = 시각) 을 [from, to] 안에서만 bin 평균 -> 창 끝의 bin 은 일부 샘플만으로 계산됨
+    def fetch(pv, start, end, session=None):
+        calls.append((pv, start, end))
+        bin_seconds = int(re.match(r"^mean_(\d+)\(", pv).group(1))
+        t = np.arange(to_epoch(start), to_epoch(end))
+        bins = t // bin_seconds * bin_seconds
+        ts, index = np.unique(bins, return_inverse=True)
+        values = np.bincount(index, weights=t) / np.bincount(index)
+        return report_gui._arrays_to_df(ts.astype(float), values)
+    return fetch
+
+
+def test_binned_cache_keeps_full_bins_at_window_edges(fake_archiver, to_epoch):
+    calls = []
+    fake_archiver(fake_binned_archiver(calls, to_epoch))
+    pv = "mean_60(TEST:PV)"
+    # 두 창의 경계 (00:10:30) 가 bin 중간
+    report_gui.fetch_pv_data_as_df(pv, "2025-01-01T00:00:00.000Z", "2025-01-01T00:10:30.000Z", use_cache=True)
+    report_gui.fetch_pv_data_as_df(pv, "2025-01-01T00:10:30.000Z", "2025-01-01T00:20:00.000Z", use_cache=True)
+    df = report_gui.fetch_pv_data_as_df(pv, "2025-01-01T00:00:00.000Z", "2025-01-01T00:20:00.000Z",
+                                        use_cache=True)
+
+    ts = report_gui.beam_stats.epoch_seconds(df["Timestamp"])
+    assert len(calls) == 2
+    assert np.all(ts % 60 == 0) and len(np.unique(ts)) == len(ts)
+    # 모든 bin 이 60 개 샘플의 평균 (= bin 시작 + 29.5)
+    np.testing.assert_array_equal(df["Value1"].to_numpy(), ts + 29.5)
+
@@ -0,0 +1,26 @@
+import schedule
+
+
+def test_contains_does_not_add_labels():
+    programs = schedule.Schedule.from_patches([("2025-09-14 06:00", 720, "CXI")])
+    assert ("2025-09-14 06:00", 720, "CXI") in programs
+    assert ("2025-09-14 06:00", 720, "MFX") not in programs
+    assert programs.find(("2025-09-14 06:00", 720, "TMO")) is None
+    assert programs.labels == ["CXI"]
+
+    comments = schedule.Schedule(with_issue=True)
+    comments.add(("2025-09-14 06:00", 30, "RF trip", "CXI"))
+    assert ("2025-09-14 06:00", 30, "vacuum", "CXI") not in comments
+    assert comments.issues == ["RF trip"]
+
+
+def test_add_remove_keep_start_order():
+    programs = schedule.Schedule()
+    for start in ["2025-09-14 06:00", "2025-09-10 06:00", "2025-09-12 06:00"]:
+        programs.add((start, 60, "CXI"))
+    assert programs.add(("2025-09-10 06:00", 60, "CXI")) is None
+    assert [row[0] for row in programs] == ["2025-09-10 06:00", "2025-09-12 06:00", "2025-09-14 06:00"]
+    assert programs.remove(1) == ("2025-09-12 06:00", 60, "CXI")
+    assert programs.replace(0, ("2025-09-20 06:00", 60, "MFX")) == 1
+    assert list(programs) == [("2025-09-14 06:00", 60, "CXI"), ("2025-09-20 06:00", 60, "MFX")]
+    assert ("2025-09-10 06:00", 60, "CXI") not in programs